@@ -0,0 +1,565 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import Article
+from .encoding import dumps
+from .config import (
+    CACHE_BACKEND, CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_POLICY, CACHE_USAGE_FLUSH_INTERVAL
+)
+
+
+@dataclass
+class CacheEntry:
+    articles: List[Article]
+    fetched_at: float
+    size: int = 0
+
+    @property
+    def age(self) -> float:
+        """Seconds since the page was fetched"""
+        return time.time() - self.fetched_at
+
+
+def approx_size(obj) -> int:
+    """Approximate the memory used by a page of articles, in bytes"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        # Keys are the same few interned strings for every article
+        size += sum(approx_size(value) for value in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(approx_size(item) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(approx_size(getattr(obj, name)) for name in obj.__slots__)
+    return size
+
+
+class LRUPolicy:
+    """Evict the page that was used least recently"""
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def insert(self, page: int):
+        self._order[page] = None
+        self._order.move_to_end(page)
+
+    def touch(self, page: int):
+        self._order.move_to_end(page)
+
+    def remove(self, page: int):
+        self._order.pop(page, None)
+
+    def victim(self, keep: int) -> int:
+        return next(page for page in self._order if page != keep)
+
+
+class LFUPolicy:
+    """Evict the page that was used least often, oldest first on ties"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+
+    def insert(self, page: int):
+        # A refreshed page keeps its use count
+        self._counts[page] = self._counts.pop(page, 0) + 1
+
+    def touch(self, page: int):
+        self._counts[page] += 1
+
+    def remove(self, page: int):
+        self._counts.pop(page, None)
+
+    def victim(self, keep: int) -> int:
+        return min((page for page in self._counts if page != keep), key=self._counts.get)
+
+
+EVICTION_POLICIES = {"lru": LRUPolicy, "lfu": LFUPolicy}
+
+
+class CacheBackend(MutableMapping):
+    """Interface for the scraper's page cache.
+
+    Behaves like a dict of page -> articles, and additionally exposes the
+    entry of each page (articles plus fetch time) and usage statistics.
+    Listeners (such as the article index) are told about every page stored
+    in or removed from the cache.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Call listener.page_stored(page, articles) and listener.page_removed(page) on changes"""
+        self._listeners.append(listener)
+
+    def _notify_stored(self, page: int, articles: List[Article]):
+        for listener in self._listeners:
+            listener.page_stored(page, articles)
+
+    def _notify_removed(self, page: int):
+        for listener in self._listeners:
+            listener.page_removed(page)
+
+    def entry(self, page: int) -> Optional[CacheEntry]:
+        """Return the cache entry for a page without counting it as a use"""
+        raise NotImplementedError
+
+    def lookup(self, page: int) -> Optional[CacheEntry]:
+        """Return the cache entry for a page, recording a hit or a miss"""
+        raise NotImplementedError
+
+    def put(self, page: int, articles: List[Article], fetched_at: float):
+        """Store a page along with the time it was fetched"""
+        raise NotImplementedError
+
+    def touch(self, page: int, fetched_at: float) -> bool:
+        """Mark a cached page as fetched again without rewriting its articles.
+
+        Returns False if the page is no longer cached.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Return usage counters and limits of the cache"""
+        raise NotImplementedError
+
+    def acquire_refresh(self, page: int, timeout: float) -> bool:
+        """Try to become the only refresher of a page for up to timeout seconds.
+
+        In-process backends always succeed, since concurrent fetches in one
+        process are already coalesced by the scraper.
+        """
+        return True
+
+    def release_refresh(self, page: int):
+        """Give up the refresh lock of a page"""
+
+    def close(self):
+        """Release files and connections held by the cache; they are reopened on the next use"""
+
+    def __getitem__(self, page: int) -> List[Article]:
+        entry = self.entry(page)
+        if entry is None:
+            raise KeyError(page)
+        return entry.articles
+
+    def __setitem__(self, page: int, articles: List[Article]):
+        self.put(page, articles, time.time())
+
+
+class PageCache(CacheBackend):
+    """In-memory page cache bounded by entry count and approximate byte size.
+
+    When either bound is exceeded, pages are evicted according to the
+    eviction policy ("lru" or "lfu"). The newest page is always kept.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, policy: str = "lru"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._policy = EVICTION_POLICIES[policy]()
+        self._entries: Dict[int, CacheEntry] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def entry(self, page: int) -> Optional[CacheEntry]:
+        return self._entries.get(page)
+
+    def lookup(self, page: int) -> Optional[CacheEntry]:
+        entry = self._entries.get(page)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._policy.touch(page)
+        return entry
+
+    def put(self, page: int, articles: List[Article], fetched_at: float):
+        entry = CacheEntry(articles, fetched_at, approx_size(articles))
+        if page in self._entries:
+            self._bytes -= self._entries[page].size
+        self._entries[page] = entry
+        self._bytes += entry.size
+        self._policy.insert(page)
+        self._notify_stored(page, articles)
+        while len(self._entries) > 1 and self._over_bounds():
+            self._remove(self._policy.victim(keep=page))
+            self.evictions += 1
+
+    def touch(self, page: int, fetched_at: float) -> bool:
+        entry = self._entries.get(page)
+        if entry is None:
+            return False
+        self._entries[page] = CacheEntry(entry.articles, fetched_at, entry.size)
+        return True
+
+    def _over_bounds(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _remove(self, page: int):
+        entry = self._entries.pop(page)
+        self._bytes -= entry.size
+        self._policy.remove(page)
+        self._notify_removed(page)
+
+    def __delitem__(self, page: int):
+        if page not in self._entries:
+            raise KeyError(page)
+        self._remove(page)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class SQLiteCache(CacheBackend):
+    """Page cache stored in a SQLite file shared by every worker process.
+
+    Pages, usage counters and refresh locks live in the database, so all
+    uvicorn workers see the same cache and only one of them refreshes a
+    given page at a time. Each query touches a handful of rows on a local
+    file, so calls are made directly from the event loop.
+
+    Listeners hear about this instance's own writes, and about pages other
+    workers stored or evicted as soon as this instance looks them up.
+
+    Decoded pages are kept per fetch time, so a warm lookup only reads the
+    page's fetch time. Hit/miss counters and page usage are batched in
+    memory and written at most every usage_flush_interval seconds (and
+    before evicting), so warm lookups don't take the database write lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+        usage_flush_interval: float = CACHE_USAGE_FLUSH_INTERVAL
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.usage_flush_interval = usage_flush_interval
+        # Last decoded version of each page, valid while its fetch time is current
+        self._decoded: Dict[int, CacheEntry] = {}
+        # Counter increments and page uses (last use, count) not yet written
+        self._pending_counters: Dict[str, int] = {}
+        self._pending_uses: Dict[int, Tuple[float, int]] = {}
+        self._flushed_at = time.monotonic()
+        # Fetch time of each page as last reported to listeners
+        self._reported: Dict[int, float] = {}
+        # Identifies this process (and instance) as a lock owner
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._connection: Optional[sqlite3.Connection] = self._connect()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The database connection, opened again on the first use after close()"""
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page INTEGER PRIMARY KEY,
+                articles TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                used_at REAL NOT NULL,
+                uses INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS locks (
+                page INTEGER PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        return db
+
+    def close(self):
+        """Write the batched counters and page uses and close the connection"""
+        if self._connection is None:
+            return
+        self.flush_usage()
+        self._connection.close()
+        self._connection = None
+
+    def _increment(self, name: str, amount: int = 1):
+        self._db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def flush_usage(self):
+        """Write the batched counters and page uses"""
+        if not self._pending_counters and not self._pending_uses:
+            return
+        with self._transaction():
+            self._write_usage()
+
+    def _write_usage(self):
+        for name, amount in self._pending_counters.items():
+            self._increment(name, amount)
+        self._db.executemany(
+            "UPDATE pages SET used_at = MAX(used_at, ?), uses = uses + ? WHERE page = ?",
+            [(used_at, uses, page) for page, (used_at, uses) in self._pending_uses.items()]
+        )
+        self._pending_counters.clear()
+        self._pending_uses.clear()
+        self._flushed_at = time.monotonic()
+
+    def _count(self, name: str):
+        self._pending_counters[name] = self._pending_counters.get(name, 0) + 1
+
+    def entry(self, page: int) -> Optional[CacheEntry]:
+        row = self._db.execute("SELECT fetched_at FROM pages WHERE page = ?", (page,)).fetchone()
+        if row is None:
+            self._decoded.pop(page, None)
+            return None
+        decoded = self._decoded.get(page)
+        if decoded is not None and decoded.fetched_at == row[0]:
+            return decoded
+        row = self._db.execute(
+            "SELECT articles, fetched_at, size FROM pages WHERE page = ?", (page,)
+        ).fetchone()
+        if row is None:
+            self._decoded.pop(page, None)
+            return None
+        entry = self._decoded[page] = CacheEntry(
+            [Article.from_dict(data) for data in json.loads(row[0])], row[1], row[2]
+        )
+        return entry
+
+    def lookup(self, page: int) -> Optional[CacheEntry]:
+        entry = self.entry(page)
+        if entry is None:
+            self._count("misses")
+            self._report_removed(page)
+        else:
+            self._count("hits")
+            if self._reported.get(page) != entry.fetched_at:
+                self._report_stored(page, entry)
+            _, uses = self._pending_uses.get(page, (0.0, 0))
+            self._pending_uses[page] = (time.time(), uses + 1)
+        if time.monotonic() - self._flushed_at >= self.usage_flush_interval:
+            self.flush_usage()
+        return entry
+
+    def put(self, page: int, articles: List[Article], fetched_at: float):
+        data = dumps(articles).decode()
+        now = time.time()
+        with self._transaction():
+            self._db.execute(
+                "INSERT INTO pages (page, articles, fetched_at, size, used_at, uses) VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT(page) DO UPDATE SET articles = excluded.articles, "
+                "fetched_at = excluded.fetched_at, size = excluded.size, used_at = excluded.used_at",
+                (page, data, fetched_at, len(data), now)
+            )
+            # Eviction picks victims by usage, so batched uses go in first
+            self._write_usage()
+            victims = self._evict(keep=page)
+        entry = self._decoded[page] = CacheEntry(articles, fetched_at, len(data))
+        self._report_stored(page, entry)
+        for victim in victims:
+            self._decoded.pop(victim, None)
+            self._report_removed(victim)
+
+    def touch(self, page: int, fetched_at: float) -> bool:
+        cursor = self._db.execute("UPDATE pages SET fetched_at = ? WHERE page = ?", (fetched_at, page))
+        decoded = self._decoded.get(page)
+        if cursor.rowcount == 1 and decoded is not None:
+            # Same articles, so the decoded version stays valid
+            self._decoded[page] = CacheEntry(decoded.articles, fetched_at, decoded.size)
+        if cursor.rowcount == 1 and page in self._reported:
+            # Same articles, so listeners needn't hear about it again
+            self._reported[page] = fetched_at
+        return cursor.rowcount == 1
+
+    def _report_stored(self, page: int, entry: CacheEntry):
+        self._reported[page] = entry.fetched_at
+        self._notify_stored(page, entry.articles)
+
+    def _report_removed(self, page: int):
+        if self._reported.pop(page, None) is not None:
+            self._notify_removed(page)
+
+    def _evict(self, keep: int) -> List[int]:
+        """Evict pages other than keep until the cache is within bounds, returning the evicted pages"""
+        order = "used_at" if self.policy == "lru" else "uses, used_at"
+        victims = []
+        while True:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            over_entries = self.max_entries is not None and count > self.max_entries
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            if count <= 1 or not (over_entries or over_bytes):
+                return victims
+            victim = self._db.execute(
+                f"SELECT page FROM pages WHERE page != ? ORDER BY {order} LIMIT 1", (keep,)
+            ).fetchone()[0]
+            self._db.execute("DELETE FROM pages WHERE page = ?", (victim,))
+            self._increment("evictions")
+            victims.append(victim)
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one write-locked transaction"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def __delitem__(self, page: int):
+        self._decoded.pop(page, None)
+        if self._db.execute("DELETE FROM pages WHERE page = ?", (page,)).rowcount == 0:
+            raise KeyError(page)
+        self._report_removed(page)
+
+    def __iter__(self) -> Iterator[int]:
+        rows = self._db.execute("SELECT page FROM pages ORDER BY page").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def stats(self) -> Dict:
+        self.flush_usage()
+        counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {
+            "policy": self.policy,
+            "entries": count,
+            "max_entries": self.max_entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0)
+        }
+
+    def acquire_refresh(self, page: int, timeout: float) -> bool:
+        now = time.time()
+        with self._transaction():
+            # Take the lock if nobody holds it or the holder's lease ran out
+            # (e.g. the worker died mid-refresh)
+            self._db.execute("DELETE FROM locks WHERE page = ? AND expires_at <= ?", (page, now))
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO locks (page, owner, expires_at) VALUES (?, ?, ?)",
+                (page, self._owner, now + timeout)
+            ).rowcount
+        return inserted == 1
+
+    def release_refresh(self, page: int):
+        self._db.execute("DELETE FROM locks WHERE page = ? AND owner = ?", (page, self._owner))
+
+
+class NamespacedCache(CacheBackend):
+    """One feed's view of a cache shared by every feed.
+
+    The feed's page N is stored under key offset + N, so all feeds share
+    one backend, its bounds and its eviction, while each sees only its own
+    pages, numbered from 1. Listeners only hear about this feed's pages.
+    """
+
+    def __init__(self, backend: CacheBackend, offset: int, span: int):
+        super().__init__()
+        self.backend = backend
+        self.offset = offset
+        self.span = span
+        backend.add_listener(self)
+
+    def _owns(self, key: int) -> bool:
+        return self.offset < key < self.offset + self.span
+
+    def entry(self, page: int) -> Optional[CacheEntry]:
+        return self.backend.entry(self.offset + page)
+
+    def lookup(self, page: int) -> Optional[CacheEntry]:
+        return self.backend.lookup(self.offset + page)
+
+    def put(self, page: int, articles: List[Article], fetched_at: float):
+        self.backend.put(self.offset + page, articles, fetched_at)
+
+    def touch(self, page: int, fetched_at: float) -> bool:
+        return self.backend.touch(self.offset + page, fetched_at)
+
+    def stats(self) -> Dict:
+        return self.backend.stats()
+
+    def acquire_refresh(self, page: int, timeout: float) -> bool:
+        return self.backend.acquire_refresh(self.offset + page, timeout)
+
+    def release_refresh(self, page: int):
+        self.backend.release_refresh(self.offset + page)
+
+    def page_stored(self, key: int, articles: List[Article]):
+        if self._owns(key):
+            self._notify_stored(key - self.offset, articles)
+
+    def page_removed(self, key: int):
+        if self._owns(key):
+            self._notify_removed(key - self.offset)
+
+    def __delitem__(self, page: int):
+        del self.backend[self.offset + page]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([key - self.offset for key in self.backend if self._owns(key)])
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.backend if self._owns(key))
+
+
+def create_cache() -> CacheBackend:
+    """Create the cache backend selected in the configuration"""
+    if CACHE_BACKEND == "memory":
+        return PageCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_POLICY)
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCache(CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_POLICY)
+    raise ValueError(f"Unknown cache backend: {CACHE_BACKEND}")
@@ -0,0 +1,126 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from .config import ARTICLES_PER_PAGE, CHANGE_FEED_QUEUE_SIZE, CHANGE_FEED_HEARTBEAT
+from .encoding import dumps
+from .metrics import CHANGE_EVENTS, CHANGE_FEED_RESETS
+from .models import Article
+
+EVENT_STREAM = "text/event-stream"
+
+# Sent to a subscriber that fell too far behind: its queued diffs were
+# dropped, so it must reload the listing before applying new ones
+RESET_EVENT = b'event: reset\ndata: {"reason":"subscriber fell behind"}\n\n'
+
+
+def _key(article: Article) -> str:
+    return article.id or article.url
+
+
+def diff_page(page: int, old: List[Article], new: List[Article]) -> Optional[Dict]:
+    """What changed on a page between two fetches, keyed by item id, or None if nothing did.
+
+    Ranks are positions in the whole listing, as shown on Hacker News.
+    """
+    first_rank = (page - 1) * ARTICLES_PER_PAGE + 1
+    old_ranks = {_key(article): (rank, article) for rank, article in enumerate(old, start=first_rank)}
+    added, moved, updated = [], [], []
+    for rank, article in enumerate(new, start=first_rank):
+        key = _key(article)
+        previous = old_ranks.pop(key, None)
+        if previous is None:
+            added.append({"rank": rank, **article.to_dict()})
+            continue
+        previous_rank, previous_article = previous
+        if previous_rank != rank:
+            moved.append({"id": key, "rank": rank, "previous_rank": previous_rank})
+        if (previous_article.points, previous_article.comments) != (article.points, article.comments):
+            updated.append({"id": key, "points": article.points, "comments": article.comments})
+    removed = list(old_ranks)
+    if not (added or removed or moved or updated):
+        return None
+    return {"page": page, "added": added, "removed": removed, "moved": moved, "updated": updated}
+
+
+class Subscription:
+    """One client's queue of encoded events, bounded so a slow client can't hold memory"""
+
+    def __init__(self, max_page: int, maxsize: int):
+        self.max_page = max_page
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.resets = 0
+
+    def offer(self, event: bytes):
+        """Queue an event without waiting; a full queue is replaced by a reset event"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET_EVENT)
+            self.resets += 1
+            CHANGE_FEED_RESETS.inc()
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+
+class ChangeFeed:
+    """Broadcasts what changed on each page as the cache stores a new version of it.
+
+    Listens to the cache like the article index. Each change is diffed and
+    encoded once, then offered to every subscriber interested in the page.
+    """
+
+    def __init__(self, queue_size: int = CHANGE_FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers: List[Subscription] = []
+        self.sequence = 0
+        # Last version of each page, kept past evictions so a page cached
+        # again is diffed against what subscribers last heard
+        self._pages: Dict[int, List[Article]] = {}
+
+    def subscribe(self, max_page: int) -> Subscription:
+        """Start receiving the changes of pages 1..max_page"""
+        subscription = Subscription(max_page, self.queue_size)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    def page_stored(self, page: int, articles: List[Article]):
+        previous = self._pages.get(page)
+        self._pages[page] = articles
+        if previous is articles:
+            return
+        change = diff_page(page, previous or [], articles)
+        if change is None:
+            return
+        self.sequence += 1
+        CHANGE_EVENTS.inc()
+        event = b"id: %d\nevent: change\ndata: %s\n\n" % (self.sequence, dumps(change))
+        for subscription in self.subscribers:
+            if page <= subscription.max_page:
+                subscription.offer(event)
+
+    def page_removed(self, page: int):
+        """Evictions change nothing upstream, so nothing is broadcast"""
+
+
+async def event_stream(
+    feed: ChangeFeed,
+    subscription: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat: float = CHANGE_FEED_HEARTBEAT
+) -> AsyncIterator[bytes]:
+    """Server-sent events for a subscription, with keep-alive comments while idle"""
+    try:
+        yield b"retry: 5000\n\n"
+        while not await is_disconnected():
+            try:
+                yield await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+    finally:
+        feed.unsubscribe(subscription)
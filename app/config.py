@@ -1,2 +1,104 @@
+import os
+
 BASE_URL = "https://news.ycombinator.com"
-MAX_PAGES = 10
\ No newline at end of file
+MAX_PAGES = 10
+# Articles Hacker News lists per page, used to map article offsets to pages
+ARTICLES_PER_PAGE = 30
+# Upper bound on upstream page fetches in flight at once
+MAX_CONCURRENT_FETCHES = 4
+# Seconds a cached page is served as fresh
+CACHE_TTL = 300
+# Seconds a stale page may still be served while it is refreshed in the
+# background; older pages are refetched before responding
+CACHE_MAX_AGE = 3600
+# Listings served besides the front page, at /<name>: seconds a page is
+# fresh, seconds it may be served stale, and fetches in flight at once.
+# All feeds share one cache, HTTP client, parser pool and upstream budget
+FEED_SETTINGS = {
+    "newest": {"ttl": 60, "max_age": 600, "concurrency": 2},
+    "ask": {"ttl": 300, "max_age": 3600, "concurrency": 1},
+    "show": {"ttl": 300, "max_age": 3600, "concurrency": 1},
+    "jobs": {"ttl": 900, "max_age": 7200, "concurrency": 1},
+}
+# Bounds of the in-memory page cache, and the policy used to evict pages
+# once either is exceeded ("lru" or "lfu")
+CACHE_MAX_ENTRIES = 500
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_POLICY = "lru"
+# Where cached pages live: "memory" keeps a private cache per process,
+# "sqlite" shares one cache file between all uvicorn workers
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", "/tmp/hackernews-cache.sqlite3")
+# Seconds between writes of the sqlite backend's hit/miss counters and page
+# usage, which are batched in memory so warm lookups don't write
+CACHE_USAGE_FLUSH_INTERVAL = 1.0
+# Seconds a worker may hold a page's refresh lock before others take over
+REFRESH_LOCK_TIMEOUT = 30
+# Seconds between checks while waiting for another worker's refresh
+REFRESH_POLL_INTERVAL = 0.05
+# File the in-memory cache is periodically saved to and reloaded from at
+# startup; unset to disable snapshots
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH")
+# Seconds between cache snapshots
+SNAPSHOT_INTERVAL = 60
+# HTML parser used to extract articles: "lxml" (fast) or "html.parser"
+# (BeautifulSoup, the original implementation)
+PARSER_ENGINE = os.getenv("PARSER_ENGINE", "lxml")
+# Where fetched HTML is parsed: "process" (a pool of worker processes, so
+# parsing scales across cores), "thread" or "inline" (on the event loop)
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "process")
+# Number of parser workers; None lets the pool pick one per CPU
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0")) or None
+# Upstream HTTP connection pool: total connections, idle keep-alive
+# connections kept open, and seconds an idle connection is kept
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 30
+# Seconds to wait for a connection to open and for response data
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_READ_TIMEOUT = 10.0
+# Outbound request budget: sustained requests per second, burst size, and
+# the floor the rate is halved down to while upstream answers 429/503
+UPSTREAM_RATE = 5.0
+UPSTREAM_BURST = 10
+UPSTREAM_MIN_RATE = 0.5
+# Retries of transient upstream errors, with jittered exponential backoff
+# starting at UPSTREAM_RETRY_BASE seconds and capped at UPSTREAM_RETRY_MAX
+UPSTREAM_RETRIES = 3
+UPSTREAM_RETRY_BASE = 0.5
+UPSTREAM_RETRY_MAX = 8.0
+# Consecutive failed fetches that open the circuit breaker, and seconds it
+# stays open (serving cached pages however old) before probing upstream
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30
+# Background crawler that warms the first CRAWL_WARM_PAGES pages at startup
+# and refreshes pages ahead of requests; set CRAWLER_ENABLED=0 to disable
+CRAWLER_ENABLED = os.getenv("CRAWLER_ENABLED", "1") != "0"
+CRAWL_WARM_PAGES = 3
+# Seconds between crawler passes
+CRAWL_TICK = 1.0
+# Refresh intervals of the most and the least requested pages, in seconds
+CRAWL_MIN_INTERVAL = 60
+CRAWL_MAX_INTERVAL = CACHE_TTL
+# Request counts halve every CRAWL_DEMAND_HALF_LIFE seconds, and pages below
+# CRAWL_MIN_DEMAND are no longer crawled (apart from the warm ones)
+CRAWL_DEMAND_HALF_LIFE = 600
+CRAWL_MIN_DEMAND = 0.1
+# Recent requests ending at page N that make the crawler prefetch page N+1
+CRAWL_PREFETCH_THRESHOLD = 3
+# Change feed: events queued per subscriber before it is sent a reset
+# instead, and seconds between keep-alive comments on an idle stream
+CHANGE_FEED_QUEUE_SIZE = 100
+CHANGE_FEED_HEARTBEAT = 15
+# Append-only log of stories' rank, points and comments at each refresh,
+# served by /history/{item_id}; set to an empty value to disable
+HISTORY_PATH = os.getenv("HISTORY_PATH", "/tmp/hackernews-history.bin")
+# Most records /history returns at once
+HISTORY_MAX_RESULTS = 10000
+# Record timings and counters for /metrics; set to 0 to skip the bookkeeping
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# With ?consistent=true, pages served together are at most this many
+# seconds apart in fetch time; older ones are refetched with the rest
+RANGE_MAX_SKEW = 10
+# Responses for /N up to this many pages are kept pre-encoded as a whole
+ENCODED_PREFIX_MAX_PAGES = 3
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from .config import (
+    MAX_PAGES, CRAWL_WARM_PAGES, CRAWL_TICK,
+    CRAWL_MIN_INTERVAL, CRAWL_MAX_INTERVAL, CRAWL_DEMAND_HALF_LIFE, CRAWL_MIN_DEMAND,
+    CRAWL_PREFETCH_THRESHOLD
+)
+from .metrics import CRAWLER_REFRESHES
+
+logger = logging.getLogger(__name__)
+
+
+class PageDemand:
+    """Exponentially decaying request counts per page.
+
+    Also counts, per page N, requests whose range ends at N, which predict
+    that N+1 will be asked for next.
+    """
+
+    def __init__(self, half_life: float = CRAWL_DEMAND_HALF_LIFE):
+        self.half_life = half_life
+        # page -> (score, time the score was last decayed to)
+        self._pages: Dict[int, Tuple[float, float]] = {}
+        self._tails: Dict[int, Tuple[float, float]] = {}
+
+    def _decayed(self, scores: Dict[int, Tuple[float, float]], page: int, now: float) -> float:
+        score, at = scores.get(page, (0.0, now))
+        return score * 0.5 ** ((now - at) / self.half_life)
+
+    def _bump(self, scores: Dict[int, Tuple[float, float]], page: int, now: float):
+        scores[page] = (self._decayed(scores, page, now) + 1, now)
+
+    def record(self, start: int, end: int, now: Optional[float] = None):
+        """Count a request for pages start..end"""
+        now = time.time() if now is None else now
+        for page in range(start, end + 1):
+            self._bump(self._pages, page, now)
+        self._bump(self._tails, end, now)
+
+    def score(self, page: int, now: Optional[float] = None) -> float:
+        return self._decayed(self._pages, page, time.time() if now is None else now)
+
+    def tail_score(self, page: int, now: Optional[float] = None) -> float:
+        return self._decayed(self._tails, page, time.time() if now is None else now)
+
+    def scores(self, now: Optional[float] = None) -> Dict[int, float]:
+        """Current demand of every page still in demand, forgetting the rest"""
+        now = time.time() if now is None else now
+        for scores in (self._pages, self._tails):
+            for page in [page for page in scores if self._decayed(scores, page, now) < CRAWL_MIN_DEMAND]:
+                del scores[page]
+        return {page: self.score(page, now) for page in self._pages}
+
+    def tails(self, now: Optional[float] = None) -> Dict[int, float]:
+        now = time.time() if now is None else now
+        return {page: self.tail_score(page, now) for page in self._tails}
+
+
+class Crawler:
+    """Keeps pages cached ahead of requests.
+
+    At startup pages 1..warm_pages are fetched. Then, every tick, pages are
+    refreshed once they are older than an interval that shrinks with their
+    share of recent requests: the most requested page every
+    CRAWL_MIN_INTERVAL seconds, rarely requested ones every
+    CRAWL_MAX_INTERVAL. When ranges ending at page N keep being requested,
+    page N+1 is fetched before anyone asks for it.
+    """
+
+    def __init__(self, scraper, warm_pages: int = CRAWL_WARM_PAGES, tick: float = CRAWL_TICK):
+        self.scraper = scraper
+        self.warm_pages = min(warm_pages, MAX_PAGES)
+        self.tick = tick
+
+    def interval(self, score: float, top: float) -> float:
+        """Seconds between refreshes of a page with this demand, given the highest demand"""
+        if score <= 0 or top <= 0:
+            return CRAWL_MAX_INTERVAL
+        return min(CRAWL_MAX_INTERVAL, max(CRAWL_MIN_INTERVAL, CRAWL_MIN_INTERVAL * top / score))
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[int, str]]:
+        """Pages to fetch now, most requested first, with the reason for each"""
+        now = time.time() if now is None else now
+        demand = self.scraper.demand
+        scores = demand.scores(now)
+        for page in range(1, self.warm_pages + 1):
+            scores.setdefault(page, 0.0)
+        top = max(scores.values(), default=0.0)
+
+        due = {}
+        for page, score in scores.items():
+            entry = self.scraper.cache.entry(page)
+            if entry is None or now - entry.fetched_at >= self.interval(score, top):
+                due[page] = (score, "schedule")
+        for page, score in demand.tails(now).items():
+            upcoming = page + 1
+            # Rounded so a burst of exactly the threshold counts despite decay
+            if round(score, 1) < CRAWL_PREFETCH_THRESHOLD or upcoming > MAX_PAGES or upcoming in due:
+                continue
+            entry = self.scraper.cache.entry(upcoming)
+            if entry is None or now - entry.fetched_at >= self.scraper.feed.ttl:
+                due[upcoming] = (score, "prefetch")
+
+        ranked = sorted(due.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(page, reason) for page, (_, reason) in ranked[:self.scraper.feed.concurrency]]
+
+    async def _refresh(self, pages: List[Tuple[int, str]]) -> List[int]:
+        """Fetch pages concurrently, returning those that were refreshed"""
+        results = await asyncio.gather(
+            *(self.scraper.refresh_page(page) for page, _ in pages), return_exceptions=True
+        )
+        refreshed = []
+        for (page, reason), result in zip(pages, results):
+            # Failures are already counted upstream; the page is due again next tick
+            if not isinstance(result, Exception):
+                CRAWLER_REFRESHES.inc(reason=reason)
+                refreshed.append(page)
+        return refreshed
+
+    async def warm_up(self) -> List[int]:
+        """Fetch the first pages that aren't already cached and fresh"""
+        pages = [
+            (page, "warmup") for page in range(1, self.warm_pages + 1)
+            if (entry := self.scraper.cache.entry(page)) is None or entry.age >= self.scraper.feed.ttl
+        ]
+        return await self._refresh(pages)
+
+    async def crawl_once(self) -> List[int]:
+        """Refresh the pages that are due, returning them"""
+        if self.scraper.breaker.is_open:
+            # The breaker's own probe decides when upstream is back
+            return []
+        return await self._refresh(self.due())
+
+    async def run(self):
+        """Warm up, then keep crawling every tick until cancelled.
+
+        A pass that fails (e.g. on a cache error) is logged and the next
+        tick tries again, so the crawler never stops on its own.
+        """
+        try:
+            await self.warm_up()
+        except Exception:
+            logger.exception("Crawler warm-up failed")
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.crawl_once()
+            except Exception:
+                logger.exception("Crawler pass failed")
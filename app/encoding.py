@@ -0,0 +1,50 @@
+import dataclasses
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+@dataclass
+class EncodedBody:
+    """A pre-encoded JSON response body and its strong ETag"""
+    body: bytes
+    etag: str
+
+
+def _default(obj):
+    """Encode article records (orjson handles dataclasses natively)"""
+    if dataclasses.is_dataclass(obj):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Encode obj as compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the body's content"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def join_arrays(arrays: Iterable[bytes]) -> bytes:
+    """Concatenate encoded JSON arrays into one array without re-encoding"""
+    items = [array[1:-1] for array in arrays if array != b"[]"]
+    return b"[" + b",".join(items) + b"]"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
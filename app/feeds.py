@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+from .config import CACHE_TTL, CACHE_MAX_AGE, MAX_CONCURRENT_FETCHES, FEED_SETTINGS
+
+# Cache keys reserved per feed; feed n stores its page N under n * FEED_KEY_SPAN + N
+FEED_KEY_SPAN = 1000
+
+
+@dataclass(frozen=True)
+class Feed:
+    """A Hacker News listing, and how its pages are cached and fetched"""
+    name: str
+    # Path of the listing on Hacker News; the front page has none
+    path: str
+    ttl: float
+    max_age: float
+    # Upper bound on this feed's page fetches in flight at once
+    concurrency: int
+    # Position of the feed's block of cache keys
+    namespace: int
+
+    def url(self, base_url: str, page: int) -> str:
+        if not self.path:
+            return f"{base_url}?p={page}"
+        return f"{base_url}/{self.path}?p={page}"
+
+    @property
+    def key_offset(self) -> int:
+        return self.namespace * FEED_KEY_SPAN
+
+
+FRONT_PAGE = Feed("news", "", CACHE_TTL, CACHE_MAX_AGE, MAX_CONCURRENT_FETCHES, 0)
+
+FEEDS: Dict[str, Feed] = {FRONT_PAGE.name: FRONT_PAGE}
+for namespace, (name, settings) in enumerate(FEED_SETTINGS.items(), start=1):
+    FEEDS[name] = Feed(name, name, settings["ttl"], settings["max_age"], settings["concurrency"], namespace)
+
+
+def feed_of(key: int) -> Optional[Feed]:
+    """The feed a key of the shared cache belongs to, or None if no feed uses its range"""
+    namespace = key // FEED_KEY_SPAN
+    return next((feed for feed in FEEDS.values() if feed.namespace == namespace), None)
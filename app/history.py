@@ -0,0 +1,150 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+from .config import ARTICLES_PER_PAGE
+from .feeds import FEED_KEY_SPAN
+from .models import Article
+
+# File header: format name and version
+MAGIC = b"HNHIST\x00\x01"
+
+# One observation of a story: item id, unix time, rank, feed namespace,
+# (padding), points, comments. 20 bytes, so a week of the first 10 pages
+# refreshed every minute is at most ~60 MB, and much less since unchanged
+# stories aren't recorded again
+RECORD = struct.Struct("<IIHBxII")
+
+
+class HistoryLog:
+    """Append-only log of stories' rank, points and comments over time.
+
+    Listens to the cache: every time a page is stored, one record per story
+    whose rank, points or comments changed since its last record is
+    appended to the file in a single write. The file is read through a
+    memory map, and an in-memory index holds each item's record times and
+    positions, so a time range of one item is found by bisection and read
+    without scanning the log. Records appended by other processes sharing
+    the file are indexed before each append and query.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "ab+") as f:
+            f.seek(0)
+            header = f.read(len(MAGIC))
+            if not header:
+                f.write(MAGIC)
+            elif header != MAGIC:
+                raise ValueError(f"{path} is not a history log")
+            # Drop a record left half-written by a crash, so later appends
+            # stay aligned
+            size = f.seek(0, os.SEEK_END)
+            f.truncate(size - (size - len(MAGIC)) % RECORD.size)
+        self._map: Optional[mmap.mmap] = None
+        self.records = 0
+        # item id -> (record times, record numbers), both in append order
+        self._items: Dict[int, Tuple[array, array]] = {}
+        # (item id, feed namespace) -> (rank, points, comments) last recorded
+        self._last: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+        self._catch_up()
+
+    def _catch_up(self):
+        """Index the records appended since the last call, remapping the grown file"""
+        size = os.path.getsize(self.path)
+        count = (size - len(MAGIC)) // RECORD.size
+        if count <= self.records and self._map is not None:
+            return
+        if self._map is not None:
+            self._map.close()
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(MAGIC) + self.records * RECORD.size
+        end = len(MAGIC) + count * RECORD.size
+        for number, record in enumerate(RECORD.iter_unpack(self._map[start:end]), start=self.records):
+            item_id, timestamp, rank, namespace, points, comments = record
+            times, numbers = self._items.setdefault(item_id, (array("I"), array("I")))
+            times.append(timestamp)
+            numbers.append(number)
+            self._last[(item_id, namespace)] = (rank, points, comments)
+        self.records = count
+
+    def append(self, key: int, articles: List[Article], timestamp: Optional[float] = None):
+        """Record the stories of a cached page (keyed as in the shared cache) that changed"""
+        self._catch_up()
+        namespace, page = divmod(key, FEED_KEY_SPAN)
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        first_rank = (page - 1) * ARTICLES_PER_PAGE + 1
+        data = bytearray()
+        for rank, article in enumerate(articles, start=first_rank):
+            if not article.id or not article.id.isdigit():
+                continue
+            item_id = int(article.id)
+            # Jobs and rows whose score wasn't parsed have no points
+            values = (rank, article.points or 0, article.comments or 0)
+            if self._last.get((item_id, namespace)) == values:
+                continue
+            data += RECORD.pack(item_id, timestamp, rank, namespace, *values[1:])
+        if not data:
+            return
+        # One O_APPEND write, so records of concurrent writers never interleave
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        self._catch_up()
+
+    def query(
+        self,
+        item_id: int,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Optional[List[Tuple[int, int, int, int, int]]]:
+        """(timestamp, namespace, rank, points, comments) of an item between since and until, oldest first.
+
+        With limit, only the latest limit records of the range are returned.
+        Returns None if the item was never recorded.
+        """
+        self._catch_up()
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+        times, numbers = item
+        lo = 0 if since is None else bisect_left(times, since)
+        hi = len(times) if until is None else bisect_right(times, until)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        results = []
+        for number in numbers[lo:hi]:
+            _, timestamp, rank, namespace, points, comments = RECORD.unpack_from(
+                self._map, len(MAGIC) + number * RECORD.size
+            )
+            results.append((timestamp, namespace, rank, points, comments))
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            "records": self.records,
+            "items": len(self._items),
+            "bytes": len(MAGIC) + self.records * RECORD.size
+        }
+
+    def page_stored(self, key: int, articles: List[Article]):
+        self.append(key, articles)
+
+    def page_removed(self, key: int):
+        """Evictions change nothing upstream, so nothing is recorded"""
+
+    def close(self):
+        """Release the memory map; it is mapped again on the next use"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
@@ -0,0 +1,179 @@
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .models import Article, unique_articles
+
+# (page, position on the page) of an indexed article, which is also its rank
+Key = Tuple[int, int]
+
+SORT_FIELDS = ("rank", "points", "comments")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a title or query"""
+    return _TOKEN.findall(text.lower())
+
+
+class ArticleIndex:
+    """Query index over the articles in the page cache.
+
+    Kept up to date page by page as the cache stores and removes pages, so
+    queries only touch matching postings and never scan every article:
+    an inverted index on title tokens, postings per submitter, and views of
+    all articles sorted by points and by comments.
+    """
+
+    def __init__(self):
+        self._pages: Dict[int, List[Article]] = {}
+        self._tokens: Dict[str, Set[Key]] = {}
+        self._users: Dict[str, Set[Key]] = {}
+        self._sorted: Dict[str, List[Tuple[int, Key]]] = {"points": [], "comments": []}
+
+    def page_stored(self, page: int, articles: List[Article]):
+        """Index a newly stored page, replacing its previous version"""
+        if self._pages.get(page) is articles:
+            return
+        self.page_removed(page)
+        self._pages[page] = articles
+        for position, article in enumerate(articles):
+            key = (page, position)
+            for token in set(tokenize(article.title)):
+                self._tokens.setdefault(token, set()).add(key)
+            self._users.setdefault(article.sent_by, set()).add(key)
+            for field, view in self._sorted.items():
+                insort(view, (self._value(article, field), key))
+
+    def page_removed(self, page: int):
+        """Drop an evicted page from the index"""
+        articles = self._pages.pop(page, None)
+        if articles is None:
+            return
+        for position, article in enumerate(articles):
+            key = (page, position)
+            for token in set(tokenize(article.title)):
+                self._discard(self._tokens, token, key)
+            self._discard(self._users, article.sent_by, key)
+            for field, view in self._sorted.items():
+                item = (self._value(article, field), key)
+                del view[bisect_left(view, item)]
+
+    def rebuild(self, pages: Iterable[Tuple[int, List[Article]]]):
+        """Index pages that were cached before the index was attached"""
+        for page, articles in pages:
+            self.page_stored(page, articles)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        user: Optional[str] = None,
+        min_points: Optional[int] = None,
+        min_comments: Optional[int] = None,
+        sort: str = "rank",
+        limit: int = 30
+    ) -> List[Article]:
+        """Return up to limit articles matching every given filter.
+
+        Articles match a query if their title contains all of its tokens.
+        Results are in listing order ("rank") or by descending points or
+        comments.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort}")
+
+        candidates = self._candidates(query, user)
+        if candidates is None:
+            keys = self._scan(sort, min_points, min_comments)
+        else:
+            if sort == "rank":
+                ordered = sorted(candidates)
+            else:
+                ordered = sorted(candidates, key=lambda key: (-self._value(self._article(key), sort), key))
+            keys = (key for key in ordered if self._matches(key, min_points, min_comments))
+
+        # A story cached on two pages is only returned once
+        seen = set()
+        results = []
+        for key in keys:
+            if len(results) >= limit:
+                break
+            results.extend(unique_articles([self._article(key)], seen))
+        return results
+
+    def _candidates(self, query: Optional[str], user: Optional[str]) -> Optional[Set[Key]]:
+        """Intersect the postings of the query tokens and user, or None if neither is given"""
+        postings = []
+        if query is not None:
+            postings.extend(self._tokens.get(token, set()) for token in tokenize(query))
+        if user is not None:
+            postings.append(self._users.get(user, set()))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _scan(self, sort: str, min_points: Optional[int], min_comments: Optional[int]) -> Iterator[Key]:
+        """Walk a sorted view from the top, without any postings to narrow it"""
+        if sort == "rank":
+            thresholds = {"points": min_points, "comments": min_comments}
+            if min_points is None and min_comments is None:
+                # Every article matches, so the walk stops after limit of them
+                for page in sorted(self._pages):
+                    for position in range(len(self._pages[page])):
+                        yield (page, position)
+                return
+            # Only the articles at or above the threshold of the more
+            # selective view are candidates; they are put in listing order
+            above = []
+            for field, threshold in thresholds.items():
+                if threshold is not None:
+                    view = self._sorted[field]
+                    above.append(view[bisect_left(view, (threshold, (0, 0))):])
+            candidates = min(above, key=len)
+            yield from sorted(
+                key for _, key in candidates if self._matches(key, min_points, min_comments)
+            )
+            return
+
+        view = self._sorted[sort]
+        # Values below the threshold on the sort field sit at the bottom of
+        # the view, so the walk stops there
+        threshold = {"points": min_points, "comments": min_comments}[sort]
+        stop = bisect_left(view, (threshold, (0, 0))) if threshold is not None else 0
+        # Walk groups of equal value high to low, each in listing order
+        end = len(view)
+        while end > stop:
+            value = view[end - 1][0]
+            begin = max(bisect_left(view, (value, (0, 0))), stop)
+            for _, key in view[begin:end]:
+                if self._matches(key, min_points, min_comments):
+                    yield key
+            end = begin
+
+    def _matches(self, key: Key, min_points: Optional[int], min_comments: Optional[int]) -> bool:
+        article = self._article(key)
+        if min_points is not None and self._value(article, "points") < min_points:
+            return False
+        return min_comments is None or article.comments >= min_comments
+
+    def _article(self, key: Key) -> Article:
+        page, position = key
+        return self._pages[page][position]
+
+    @staticmethod
+    def _value(article: Article, field: str) -> int:
+        # Job postings have no points; they sort as zero
+        return getattr(article, field) or 0
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[Key]], name: str, key: Key):
+        keys = postings.get(name)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del postings[name]
+
+    def __len__(self) -> int:
+        return sum(len(articles) for articles in self._pages.values())
@@ -1,5 +1,53 @@
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from .config import SNAPSHOT_PATH, SNAPSHOT_INTERVAL, CRAWLER_ENABLED
+from .crawler import Crawler
+from .dependencies import get_scraper
 from .routes import router
+from .snapshot import load_snapshot, save_snapshot_async, snapshot_periodically
 
-app = FastAPI(title="Hacker News Scraper API", version="1.0.0")
-app.include_router(router)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the connection pool, restore and keep saving the cache snapshot, and run the crawler"""
+    scraper = get_scraper()
+    await scraper.open()
+    snapshot_task = None
+    if SNAPSHOT_PATH:
+        load_snapshot(scraper.store, SNAPSHOT_PATH)
+        snapshot_task = asyncio.create_task(
+            snapshot_periodically(scraper.store, SNAPSHOT_PATH, SNAPSHOT_INTERVAL)
+        )
+    # Started after the snapshot is restored, so only missing or stale
+    # pages are warmed up
+    crawler_task = asyncio.create_task(Crawler(scraper).run()) if CRAWLER_ENABLED else None
+
+    yield
+
+    if crawler_task is not None:
+        crawler_task.cancel()
+        # The crawler logs its own failures; none may keep the cache from
+        # being saved or the scraper from being closed
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await crawler_task
+    try:
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await snapshot_task
+            try:
+                await save_snapshot_async(scraper.store, SNAPSHOT_PATH)
+            except OSError:
+                # The next start is only colder; connections still get closed
+                logger.exception("Failed to save the cache snapshot to %s", SNAPSHOT_PATH)
+    finally:
+        await scraper.close()
+
+
+app = FastAPI(title="Hacker News Scraper API", version="1.0.0", lifespan=lifespan)
+app.include_router(router)
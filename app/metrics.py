@@ -0,0 +1,225 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Sequence, Tuple
+from .config import METRICS_ENABLED
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond encoding to slow fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Per-row parse costs are in the microseconds
+ROW_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001)
+
+LabelValues = Tuple[str, ...]
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric with optional labels, rendered in the Prometheus text format"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not REGISTRY.enabled:
+            return
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class CounterSnapshot(Gauge):
+    """A counter kept elsewhere (e.g. by the cache), copied in before rendering"""
+    type = "counter"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets) + (float("inf"),)
+        # Per label set: count per bucket (not cumulative), sum, count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        if not REGISTRY.enabled:
+            return
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * len(self.buckets), [0.0, 0])
+        counts, totals = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def time(self, **labels):
+        """Context manager observing the duration of its block, or doing nothing when disabled"""
+        if not REGISTRY.enabled:
+            return nullcontext()
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: Dict[str, str]):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[1][1] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, (total, count)) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """The process's metrics. Recording is skipped entirely when disabled."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(METRICS_ENABLED)
+
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "hn_upstream_request_seconds", "Duration of each upstream request attempt", ["outcome"]
+))
+SCRAPE_SECONDS = REGISTRY.register(Histogram(
+    "hn_scrape_seconds", "Time spent scraping a page, split into network (including retries) and parse", ["phase"]
+))
+PARSE_ROW_SECONDS = REGISTRY.register(Histogram(
+    "hn_parse_row_seconds", "Parse time of a page divided by its article rows", buckets=ROW_BUCKETS
+))
+ASSEMBLE_SECONDS = REGISTRY.register(Histogram(
+    "hn_assemble_seconds", "Time to gather the pages of a response, including fetches", ["view"]
+))
+ENCODE_SECONDS = REGISTRY.register(Histogram(
+    "hn_encode_seconds", "Time to serialize a response body", ["view"]
+))
+REFRESHES = REGISTRY.register(Counter(
+    "hn_refreshes_total", "Page refreshes by whether the page had changed upstream", ["result"]
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    "hn_upstream_retries_total", "Upstream requests retried after a transient error"
+))
+CRAWLER_REFRESHES = REGISTRY.register(Counter(
+    "hn_crawler_refreshes_total", "Pages fetched by the background crawler", ["reason"]
+))
+CHANGE_EVENTS = REGISTRY.register(Counter(
+    "hn_change_events_total", "Page changes broadcast on the change feed"
+))
+CHANGE_FEED_RESETS = REGISTRY.register(Counter(
+    "hn_change_feed_resets_total", "Change feed subscribers reset after falling behind"
+))
+CHANGE_FEED_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "hn_change_feed_subscribers", "Clients connected to the change feed"
+))
+CACHE_PAGES = REGISTRY.register(Gauge("hn_cache_pages", "Pages in the cache"))
+CACHE_BYTES = REGISTRY.register(Gauge("hn_cache_bytes", "Approximate size of the cached pages"))
+CACHE_LOOKUPS = REGISTRY.register(CounterSnapshot(
+    "hn_cache_lookups_total", "Page cache lookups by result", ["result"]
+))
+CACHE_EVICTIONS = REGISTRY.register(CounterSnapshot("hn_cache_evictions_total", "Pages evicted from the cache"))
+BREAKER_OPEN = REGISTRY.register(Gauge(
+    "hn_upstream_breaker_open", "Whether the upstream circuit breaker is open (1) or half-open (0.5)"
+))
+UPSTREAM_RATE = REGISTRY.register(Gauge(
+    "hn_upstream_rate", "Current upstream request rate limit, per second"
+))
+
+
+def render_metrics(scraper) -> str:
+    """Render every metric, sampling the scraper's cache and upstream state first"""
+    stats = scraper.cache.stats()
+    CACHE_PAGES.set(stats["entries"])
+    CACHE_BYTES.set(stats["bytes"])
+    CACHE_LOOKUPS.set(stats["hits"], result="hit")
+    CACHE_LOOKUPS.set(stats["misses"], result="miss")
+    CACHE_EVICTIONS.set(stats["evictions"])
+    BREAKER_OPEN.set({"closed": 0, "half_open": 0.5, "open": 1}[scraper.breaker.state])
+    UPSTREAM_RATE.set(scraper.rate_limiter.rate)
+    CHANGE_FEED_SUBSCRIBERS.set(len(scraper.changes.subscribers))
+    return REGISTRY.render()
@@ -0,0 +1,63 @@
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+
+@dataclass(slots=True)
+class Article:
+    """Compact in-memory record of an article.
+
+    The cache holds these instead of per-article dicts; they are turned into
+    the public JSON shape only when a response is built. Usernames and ages
+    repeat across articles and pages, so they are interned. The id is the
+    Hacker News item id, which identifies a story across pages and fetches.
+    """
+    title: str
+    url: str
+    points: Optional[int]
+    sent_by: str
+    published: Optional[str]
+    comments: int
+    id: Optional[str] = None
+
+    def __post_init__(self):
+        self.sent_by = sys.intern(self.sent_by)
+        if self.published is not None:
+            self.published = sys.intern(self.published)
+
+    def __reduce__(self):
+        # Unpickled through the constructor, so records coming back from the
+        # parser processes are interned in this process too
+        return (Article, tuple(getattr(self, name) for name in self.__slots__))
+
+    def to_dict(self) -> Dict:
+        """Public JSON shape of the article"""
+        return {
+            "title": self.title,
+            "url": self.url,
+            "points": self.points,
+            "sent_by": self.sent_by,
+            "published": self.published,
+            "comments": self.comments,
+            "id": self.id
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Article":
+        return cls(**data)
+
+
+def unique_articles(articles: Iterable[Article], seen: Set[str]) -> List[Article]:
+    """Articles whose id is not in seen yet, in order, adding their ids to seen.
+
+    Rankings shift between page fetches, so pages cached at different times
+    can list the same story twice; the first (highest ranked) one is kept.
+    """
+    unique = []
+    for article in articles:
+        if article.id is not None:
+            if article.id in seen:
+                continue
+            seen.add(article.id)
+        unique.append(article)
+    return unique
@@ -0,0 +1,205 @@
+import re
+from typing import Callable, Dict, List, Optional, Union
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+import lxml.html
+from .models import Article
+
+_NUMBER = re.compile(r'(\d+)')
+
+# Rows and cells carry several classes (e.g. "athing submission"), so match
+# a class token the way BeautifulSoup's class_ filter does
+_ATHING_ROWS = lxml.html.etree.XPath(
+    "//tr[contains(concat(' ', normalize-space(@class), ' '), ' athing ')]"
+)
+
+
+def extract_article_data(row, base_url: str) -> Optional[Article]:
+    """Extract article data from a BeautifulSoup row element"""
+    try:
+        titleline = row.find('span', class_='titleline')
+        if not titleline:
+            return None
+
+        title_link = titleline.find('a')
+        if not title_link:
+            return None
+
+        title = title_link.get_text(strip=True)
+        url = title_link.get('href', '')
+        url = urljoin(base_url, url)
+
+        metadata_row = row.find_next_sibling('tr')
+
+        # Initialize with defaults
+        points = 0
+        sent_by = "unknown"
+        comments = 0
+        published = None
+
+        # Extract metadata if available
+        if metadata_row:
+            subtext = metadata_row.find('td', class_='subtext')
+            if subtext:
+                # Extract points
+                score_span = subtext.find('span', class_='score')
+                if score_span:
+                    try:
+                        points_text = score_span.get_text()
+                        points = re.search(r'(\d+)', points_text)
+                        if points:
+                            points = int(points.group(1))
+                    except (ValueError, IndexError):
+                        points = None
+
+                # Extract sent_by
+                sent_by_link = subtext.find('a', class_='hnuser')
+                if sent_by_link:
+                    sent_by = sent_by_link.get_text(strip=True)
+
+                # Extract comments
+                comment_links = subtext.find_all('a')
+                for link in comment_links:
+                    link_text = link.get_text(strip=True)
+                    if 'comment' in link_text:
+                        comment_text = link.get_text()
+                        comment_match = re.search(r'(\d+)', comment_text)
+                        if comment_match:
+                            comments = int(comment_match.group(1))
+                        break
+
+                # Extract timestamp from age span
+                age_span = subtext.find('span', class_='age')
+                if age_span:
+                    if age_span.find('a'):
+                        # If the age span has a link, use its text
+                        published = age_span.find('a').get_text(strip=True)
+                    else:
+                        published = age_span.get_text(strip=True)
+
+        return Article(title, url, points, sent_by, published, comments, row.get('id'))
+
+    except Exception:
+        return None
+
+
+def parse_articles_bs4(content: Union[bytes, str], base_url: str) -> List[Article]:
+    """Parse a Hacker News listing with BeautifulSoup's html.parser"""
+    soup = BeautifulSoup(content, 'html.parser')
+    articles = []
+
+    article_rows = soup.find_all('tr', class_='athing')
+    for row in article_rows:
+        try:
+            article = extract_article_data(row, base_url)
+            if article:
+                articles.append(article)
+        except Exception:
+            continue
+
+    return articles
+
+
+def _text(element, strip: bool = True) -> str:
+    """Text of an element, stripped the way BeautifulSoup's get_text(strip=True) does"""
+    if not strip:
+        return ''.join(element.itertext())
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def _has_class(element, name: str) -> bool:
+    return name in (element.get('class') or '').split()
+
+
+def _find(element, tag: str, class_name: Optional[str] = None):
+    """First descendant with the given tag (and class), like BeautifulSoup's find"""
+    for child in element.iterdescendants(tag):
+        if class_name is None or _has_class(child, class_name):
+            return child
+    return None
+
+
+def extract_article_data_lxml(row, base_url: str) -> Optional[Article]:
+    """Extract article data from an lxml row element.
+
+    Mirrors extract_article_data field by field so both engines return
+    identical articles.
+    """
+    try:
+        titleline = _find(row, 'span', 'titleline')
+        if titleline is None:
+            return None
+        title_link = _find(titleline, 'a')
+        if title_link is None:
+            return None
+
+        title = _text(title_link)
+        url = urljoin(base_url, title_link.get('href', ''))
+
+        points = 0
+        sent_by = "unknown"
+        comments = 0
+        published = None
+
+        metadata_row = next(row.itersiblings('tr'), None)
+        subtext = _find(metadata_row, 'td', 'subtext') if metadata_row is not None else None
+        if subtext is not None:
+            # One pass over the subtext; like find(), only the first score,
+            # user, comments link and age count
+            score_found = user_found = comments_found = age_found = False
+            for element in subtext.iterdescendants('span', 'a'):
+                if element.tag == 'a':
+                    if not user_found and _has_class(element, 'hnuser'):
+                        sent_by = _text(element)
+                        user_found = True
+                    if not comments_found and 'comment' in _text(element):
+                        match = _NUMBER.search(_text(element, strip=False))
+                        if match:
+                            comments = int(match.group(1))
+                        comments_found = True
+                elif not score_found and _has_class(element, 'score'):
+                    match = _NUMBER.search(_text(element, strip=False))
+                    points = int(match.group(1)) if match else None
+                    score_found = True
+                elif not age_found and _has_class(element, 'age'):
+                    age_link = _find(element, 'a')
+                    published = _text(age_link if age_link is not None else element)
+                    age_found = True
+
+        return Article(title, url, points, sent_by, published, comments, row.get('id'))
+
+    except Exception:
+        return None
+
+
+def parse_articles_lxml(content: Union[bytes, str], base_url: str) -> List[Article]:
+    """Parse a Hacker News listing with lxml, visiting only the article rows"""
+    if isinstance(content, bytes):
+        # Hacker News serves UTF-8 without a <meta charset>, which libxml2
+        # would otherwise read as Latin-1
+        content = content.decode('utf-8', errors='replace')
+    if not content.strip():
+        return []
+    document = lxml.html.document_fromstring(content)
+
+    articles = []
+    for row in _ATHING_ROWS(document):
+        article = extract_article_data_lxml(row, base_url)
+        if article:
+            articles.append(article)
+    return articles
+
+
+PARSERS: Dict[str, Callable[[Union[bytes, str], str], List[Article]]] = {
+    "html.parser": parse_articles_bs4,
+    "lxml": parse_articles_lxml,
+}
+
+
+def parse_articles(content: Union[bytes, str], base_url: str, engine: str = "lxml") -> List[Article]:
+    """Parse a Hacker News listing into article records with the given engine"""
+    try:
+        parser = PARSERS[engine]
+    except KeyError:
+        raise ValueError(f"Unknown parser engine: {engine}") from None
+    return parser(content, base_url)
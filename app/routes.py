@@ -1,20 +1,176 @@
-from fastapi import APIRouter, Depends
-from .scraper import HackerNewsScraper 
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from .config import ARTICLES_PER_PAGE, HISTORY_MAX_RESULTS, MAX_PAGES
+from .scraper import HackerNewsScraper
 from .dependencies import get_scraper
+from .encoding import EncodedBody, dumps, etag_matches
+from .feeds import FEEDS, FRONT_PAGE
+from .metrics import CONTENT_TYPE, render_metrics
+from .changes import EVENT_STREAM, event_stream
+
+NDJSON = "application/x-ndjson"
 
 router = APIRouter()
 
+def json_response(request: Request, encoded: EncodedBody) -> Response:
+    """Send pre-encoded JSON, or 304 Not Modified if the client already has it"""
+    headers = {"ETag": encoded.etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
+
+def ndjson_response(scraper: HackerNewsScraper, num_pages: int) -> StreamingResponse:
+    """Stream articles as newline-delimited JSON, page by page as they become available"""
+    # Validate before the 200 status line is sent
+    scraper.validate_num_pages(num_pages)
+
+    async def lines():
+        try:
+            async for articles in scraper.iter_pages(num_pages):
+                yield b"".join(dumps(article) + b"\n" for article in articles)
+        except HTTPException as e:
+            # Headers are already sent, so report the failure in the stream
+            yield dumps({"error": e.detail}) + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON)
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get("accept", "")
+
 @router.get("/")
-async def get_front_page(scraper: HackerNewsScraper = Depends(get_scraper)):
+async def get_front_page(request: Request, scraper: HackerNewsScraper = Depends(get_scraper)):
     """Get the front page articles"""
-    return scraper.get_articles(1)
+    if wants_ndjson(request):
+        return ndjson_response(scraper, 1)
+    return json_response(request, await scraper.get_articles_json(1))
 
 @router.get("/cache")
 async def get_cache(scraper: HackerNewsScraper = Depends(get_scraper)):
     """Get information about the current cache"""
     return scraper.get_cache_status()
 
+@router.get("/changes")
+async def stream_changes(
+    request: Request,
+    pages: int = MAX_PAGES,
+    scraper: HackerNewsScraper = Depends(get_scraper)
+):
+    """Push what changed on pages 1..pages, as server-sent events, whenever they are refreshed"""
+    scraper.validate_num_pages(pages)
+    subscription = scraper.changes.subscribe(pages)
+    return StreamingResponse(
+        event_stream(scraper.changes, subscription, request.is_disconnected),
+        media_type=EVENT_STREAM,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/history/{item_id}")
+async def get_item_history(
+    item_id: int,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: int = HISTORY_MAX_RESULTS,
+    scraper: HackerNewsScraper = Depends(get_scraper)
+):
+    """Get a story's rank, points and comments over time, optionally between two unix times"""
+    return scraper.get_history(item_id, since, until, limit)
+
+@router.get("/metrics")
+async def get_metrics(scraper: HackerNewsScraper = Depends(get_scraper)):
+    """Get timings and counters in the Prometheus text format"""
+    return Response(content=render_metrics(scraper), media_type=CONTENT_TYPE)
+
+@router.get("/pages")
+async def get_page_range(
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    consistent: bool = False,
+    feed: str = FRONT_PAGE.name,
+    scraper: HackerNewsScraper = Depends(get_scraper)
+):
+    """Get articles from pages start..end, or a window of limit articles from offset, of any feed"""
+    scraper = scraper.for_feed(feed)
+    if offset is None and limit is None:
+        start = 1 if start is None else start
+        end = start if end is None else end
+        return json_response(request, await scraper.get_range_json(start, end, consistent))
+    if start is not None or end is not None:
+        raise HTTPException(status_code=400, detail="Use either start/end or offset/limit")
+
+    offset = 0 if offset is None else offset
+    limit = ARTICLES_PER_PAGE if limit is None else limit
+    response = json_response(request, await scraper.get_window_json(offset, limit, consistent))
+    # Cursor for the next window, while there is one; the last window is
+    # cut short so a limit that doesn't divide the listing still reaches its end
+    next_offset = offset + limit
+    max_articles = MAX_PAGES * ARTICLES_PER_PAGE
+    if next_offset < max_articles:
+        query = f"offset={next_offset}&limit={min(limit, max_articles - next_offset)}"
+        if feed != FRONT_PAGE.name:
+            query += f"&feed={feed}"
+        response.headers["Link"] = f'</pages?{query}>; rel="next"'
+    return response
+
+@router.get("/search")
+async def search_articles(
+    q: Optional[str] = None,
+    user: Optional[str] = None,
+    min_points: Optional[int] = None,
+    min_comments: Optional[int] = None,
+    sort: str = "rank",
+    limit: int = ARTICLES_PER_PAGE,
+    scraper: HackerNewsScraper = Depends(get_scraper)
+):
+    """Search the cached articles by title words, submitter, points and comments"""
+    return scraper.search(q, user, min_points, min_comments, sort, limit)
+
+def add_feed_routes(name: str):
+    """Serve a feed's first page at /name and its pages 1..N at /name/N"""
+
+    @router.get(f"/{name}")
+    async def get_feed_front_page(request: Request, scraper: HackerNewsScraper = Depends(get_scraper)):
+        """Get the first page of the feed"""
+        scraper = scraper.for_feed(name)
+        if wants_ndjson(request):
+            return ndjson_response(scraper, 1)
+        return json_response(request, await scraper.get_articles_json(1))
+
+    @router.get(f"/{name}/{{num_pages}}")
+    async def get_feed_pages(
+        num_pages: int,
+        request: Request,
+        consistent: bool = False,
+        scraper: HackerNewsScraper = Depends(get_scraper)
+    ):
+        """Get articles from multiple pages of the feed"""
+        scraper = scraper.for_feed(name)
+        if wants_ndjson(request):
+            return ndjson_response(scraper, num_pages)
+        return json_response(request, await scraper.get_articles_json(num_pages, consistent))
+
+# Registered before /{num_pages}, which would otherwise take /newest for a page count
+for feed in FEEDS.values():
+    if feed is not FRONT_PAGE:
+        add_feed_routes(feed.name)
+
+@router.get("/stream/{num_pages}")
+async def stream_multiple_pages(num_pages: int, scraper: HackerNewsScraper = Depends(get_scraper)):
+    """Stream articles from multiple pages as NDJSON"""
+    return ndjson_response(scraper, num_pages)
+
 @router.get("/{num_pages}")
-async def get_multiple_pages(num_pages: int, scraper: HackerNewsScraper = Depends(get_scraper)):
+async def get_multiple_pages(
+    num_pages: int,
+    request: Request,
+    consistent: bool = False,
+    scraper: HackerNewsScraper = Depends(get_scraper)
+):
     """Get articles from multiple pages"""
-    return scraper.get_articles(num_pages)
\ No newline at end of file
+    if wants_ndjson(request):
+        return ndjson_response(scraper, num_pages)
+    return json_response(request, await scraper.get_articles_json(num_pages, consistent))
@@ -1,150 +1,643 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+import asyncio
+import hashlib
+import importlib.util
+import time
+import httpx
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
 from fastapi import HTTPException
-from urllib.parse import urljoin
-import re
-from .config import BASE_URL, MAX_PAGES
+from .cache import CacheBackend, CacheEntry, NamespacedCache, create_cache
+from .config import (
+    BASE_URL, MAX_PAGES, REFRESH_LOCK_TIMEOUT, REFRESH_POLL_INTERVAL, PARSER_ENGINE, PARSE_EXECUTOR, PARSE_WORKERS,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, ENCODED_PREFIX_MAX_PAGES, ARTICLES_PER_PAGE,
+    RANGE_MAX_SKEW, UPSTREAM_RATE, UPSTREAM_BURST, UPSTREAM_MIN_RATE, UPSTREAM_RETRIES,
+    UPSTREAM_RETRY_BASE, UPSTREAM_RETRY_MAX, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT,
+    HISTORY_PATH, HISTORY_MAX_RESULTS
+)
+from .changes import ChangeFeed
+from .crawler import PageDemand
+from .encoding import EncodedBody, dumps, join_arrays, make_etag
+from .feeds import FEED_KEY_SPAN, FEEDS, FRONT_PAGE, Feed
+from .history import HistoryLog
+from .index import ArticleIndex, SORT_FIELDS
+from .metrics import (
+    ASSEMBLE_SECONDS, ENCODE_SECONDS, PARSE_ROW_SECONDS, REFRESHES, SCRAPE_SECONDS,
+    UPSTREAM_RETRIES as RETRIES_TOTAL, UPSTREAM_SECONDS
+)
+from .models import Article, unique_articles
+from .parsers import parse_articles
+from .upstream import (
+    CircuitBreaker, RetryPolicy, TokenBucket, UpstreamUnavailable,
+    THROTTLE_STATUSES, is_transient, retry_after
+)
+
+# HTTP/2 and brotli decoding are used when their optional packages are installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+BROTLI_AVAILABLE = any(
+    importlib.util.find_spec(name) is not None for name in ("brotli", "brotlicffi")
+)
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+
+def create_client() -> httpx.AsyncClient:
+    """Create the pooled keep-alive client used for upstream requests"""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        headers={"Accept-Encoding": ACCEPT_ENCODING}
+    )
+
+
+@dataclass
+class PageValidators:
+    """What identifies the last fetched version of a page upstream"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[bytes] = None
+
+    def headers(self) -> Dict[str, str]:
+        """Conditional request headers for these validators"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _header(response, name: str) -> Optional[str]:
+    value = response.headers.get(name)
+    return value if isinstance(value, str) else None
+
 
 class HackerNewsScraper:
-    def __init__(self):
-        self.base_url = BASE_URL
-        self.cache = {}
+    """Serves one feed's pages from the cache, fetching them from Hacker News as needed.
+
+    The scraper created without a root serves the front page and owns what
+    every feed shares: the cache backend, HTTP client, parser pool and
+    upstream protection. for_feed() returns the scrapers of the other
+    feeds, which use those and keep only their own pages and fetch budget.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[CacheBackend] = None,
+        feed: Feed = FRONT_PAGE,
+        root: Optional["HackerNewsScraper"] = None
+    ):
+        self.feed = feed
+        self.root = root if root is not None else self
+        if root is None:
+            self.base_url = BASE_URL
+            self.parser_engine = PARSER_ENGINE
+            self.parse_executor = PARSE_EXECUTOR
+            self._executor = None
+            # Protection of (and from) upstream: outbound rate, retries of
+            # transient errors, and failing fast while it is down
+            self.rate_limiter = TokenBucket(UPSTREAM_RATE, UPSTREAM_BURST, UPSTREAM_MIN_RATE)
+            self.retry_policy = RetryPolicy(UPSTREAM_RETRIES, UPSTREAM_RETRY_BASE, UPSTREAM_RETRY_MAX)
+            self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+            self.retries = 0
+            self.store = cache if cache is not None else create_cache()
+            self._feeds = {feed.name: self}
+            # Points and comments of every feed's stories over time
+            self.history = HistoryLog(HISTORY_PATH) if HISTORY_PATH else None
+            if self.history is not None:
+                self.store.add_listener(self.history)
+        else:
+            self.store = root.store
+        # Pre-encoded JSON per page and per /N prefix, tagged with the fetch
+        # times they were built from
+        self._encoded_pages: Dict[int, Tuple[float, bytes]] = {}
+        self._encoded_prefixes: Dict[int, Tuple[Tuple[float, ...], EncodedBody]] = {}
+        # Validators of the last fetched version of each page, used to skip
+        # re-parsing pages that haven't changed
+        self._validators: Dict[int, PageValidators] = {}
+        self.refreshes = {"changed": 0, "unchanged": 0}
+        # Which pages clients ask for, steering the background crawler
+        self.demand = PageDemand()
+        # This feed's pages of the shared cache, numbered from 1
+        self.cache = NamespacedCache(self.store, feed.key_offset, FEED_KEY_SPAN)
+        # Query index over the cached articles, kept in step with the cache
+        self.index = ArticleIndex()
+        self.index.rebuild((page, self.cache[page]) for page in list(self.cache))
+        self.cache.add_listener(self.index)
+        # Diffs of refreshed pages, pushed to change feed subscribers
+        self.changes = ChangeFeed()
+        self.cache.add_listener(self.changes)
+        self._client = None
+        self._semaphore = None
+        self._inflight = {}
+        self._loop = None
+
+    def _bind_loop(self):
+        """Recreate loop-bound state when called from a new event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pooled connections and asyncio primitives belong to the loop
+            # that created them, so a new loop (e.g. one per TestClient
+            # request) gets fresh ones
+            if self.root is self:
+                self._client = create_client()
+            self._semaphore = asyncio.Semaphore(self.feed.concurrency)
+            self._inflight = {}
+            self._loop = loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, shared by all feeds, bound to the running event loop"""
+        root = self.root
+        root._bind_loop()
+        return root._client
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Return the parser pool shared by all feeds, or None when parsing inline"""
+        root = self.root
+        if root.parse_executor == "inline":
+            return None
+        if root._executor is None:
+            if root.parse_executor == "process":
+                root._executor = ProcessPoolExecutor(PARSE_WORKERS)
+            elif root.parse_executor == "thread":
+                root._executor = ThreadPoolExecutor(PARSE_WORKERS)
+            else:
+                raise ValueError(f"Unknown parse executor: {root.parse_executor}")
+        return root._executor
+
+    async def _parse(self, content: Union[bytes, str]) -> List[Article]:
+        """Parse fetched HTML into article records, in the parser pool if one is configured"""
+        executor = self._get_executor()
+        base_url, engine = self.root.base_url, self.root.parser_engine
+        if executor is None:
+            return parse_articles(content, base_url, engine)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, parse_articles, content, base_url, engine)
+
+    def for_feed(self, name: str) -> "HackerNewsScraper":
+        """Return the scraper of a feed, created on first use"""
+        root = self.root
+        scraper = root._feeds.get(name)
+        if scraper is None:
+            if name not in FEEDS:
+                raise HTTPException(status_code=404, detail=f"Unknown feed: {name}")
+            scraper = root._feeds[name] = HackerNewsScraper(feed=FEEDS[name], root=root)
+        return scraper
+
+    async def open(self):
+        """Open the pooled HTTP client on the running event loop"""
+        self._bind_loop()
+
+    async def close(self):
+        """Close the pooled HTTP client, the parser pool, the cache store and the history log's memory map"""
+        if self.root is not self:
+            return await self.root.close()
+        self.store.close()
+        if self.history is not None:
+            self.history.close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
     
-    def scrape_page(self, page_num: int = 1) -> List[Dict]:
+    async def scrape_page(self, page_num: int = 1) -> List[Dict]:
         """Scrape a single page of Hacker News"""
+        return [article.to_dict() for article in await self._scrape_page(page_num)]
+    
+    async def _scrape_page(self, page_num: int, validators: Optional[PageValidators] = None) -> Optional[List[Article]]:
+        """Scrape a page, or return None if it is unchanged since validators were taken"""
 
-        url = f"{self.base_url}?p={page_num}"
+        url = self.feed.url(self.root.base_url, page_num)
         
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            articles = []
+            with SCRAPE_SECONDS.time(phase="network"):
+                response = await self._request(url, validators)
+            if response.status_code == 304:
+                return None
             
-            article_rows = soup.find_all('tr', class_='athing')
-            for row in article_rows:
-                try:
-                    article = self._extract_article_data(row)
-                    if article:
-                        articles.append(article)
-                except Exception:
-                    continue
+            content = response.content
+            content_hash = hashlib.blake2b(
+                content.encode() if isinstance(content, str) else content, digest_size=16
+            ).digest()
+            self._validators[page_num] = PageValidators(
+                _header(response, "ETag"), _header(response, "Last-Modified"), content_hash
+            )
+            # Upstream may not support conditional requests; an identical
+            # body is just as unchanged
+            if validators is not None and validators.content_hash == content_hash:
+                return None
             
+            started = time.perf_counter()
+            articles = await self._parse(content)
+            elapsed = time.perf_counter() - started
+            SCRAPE_SECONDS.observe(elapsed, phase="parse")
+            if articles:
+                PARSE_ROW_SECONDS.observe(elapsed / len(articles))
             return articles
             
+        except UpstreamUnavailable as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Hacker News is unavailable: {str(e)}",
+                headers={"Retry-After": str(max(1, round(e.retry_after)))}
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500, 
                 detail=f"Failed to fetch Hacker News: {str(e)}"
             )
     
-    def _extract_article_data(self, row) -> Optional[Dict]:
-        """Extract article data from a row element"""
-        try:
-            titleline = row.find('span', class_='titleline')
-            if not titleline:
-                return None
-                
-            title_link = titleline.find('a')
-            if not title_link:
-                return None
-                
-            title = title_link.get_text(strip=True)
-            url = title_link.get('href', '')
-            url = urljoin(self.base_url, url)
+    async def _request(self, url: str, validators: Optional[PageValidators] = None) -> httpx.Response:
+        """GET url within the rate limit, retrying transient errors, behind the circuit breaker.
 
-            metadata_row = row.find_next_sibling('tr')
-            
-            # Initialize with defaults
-            points = 0
-            sent_by = "unknown"
-            comments = 0
-            published = None
-
-            # Extract metadata if available
-            if metadata_row:
-                subtext = metadata_row.find('td', class_='subtext')
-                if subtext:
-                    # Extract points
-                    score_span = subtext.find('span', class_='score')
-                    if score_span:
-                        try:
-                            points_text = score_span.get_text()
-                            points = re.search(r'(\d+)', points_text)
-                            if points:
-                                points = int(points.group(1))
-                        except (ValueError, IndexError):
-                            points = None
-                    
-                    # Extract sent_by
-                    sent_by_link = subtext.find('a', class_='hnuser')
-                    if sent_by_link:
-                        sent_by = sent_by_link.get_text(strip=True)
-                    
-                    # Extract comments
-                    comment_links = subtext.find_all('a')
-                    for link in comment_links:
-                        link_text = link.get_text(strip=True)
-                        if 'comment' in link_text:
-                            comment_text = link.get_text()
-                            comment_match = re.search(r'(\d+)', comment_text)
-                            if comment_match:
-                                comments = int(comment_match.group(1))
-                            break
-                    
-                    # Extract timestamp from age span
-                    age_span = subtext.find('span', class_='age')
-                    if age_span:
-                        if age_span.find('a'):
-                            # If the age span has a link, use its text
-                            published = age_span.find('a').get_text(strip=True)
-                        else:
-                            published = age_span.get_text(strip=True)
-
-            return {
-                "title": title,
-                "url": url,
-                "points": points,
-                "sent_by": sent_by,
-                "published": published,
-                "comments": comments
-            }
-            
-        except Exception:
-            return None
+        The limit, retry budget and breaker are shared by all feeds.
+        """
+        root = self.root
+        if not root.breaker.allow():
+            raise UpstreamUnavailable(root.breaker.retry_after())
+        client = self._get_client()
+        headers = validators.headers() if validators is not None else {}
+        attempt = 0
+        while True:
+            await root.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                if headers:
+                    response = await client.get(url, headers=headers)
+                else:
+                    response = await client.get(url)
+                if response.status_code != 304:
+                    response.raise_for_status()
+            except Exception as e:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                if not is_transient(e):
+                    # Our request (or page) is at fault, not upstream's health
+                    root.breaker.record_success()
+                    raise
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in THROTTLE_STATUSES:
+                    root.rate_limiter.throttle()
+                if attempt >= root.retry_policy.retries:
+                    root.breaker.record_failure()
+                    raise
+                await asyncio.sleep(root.retry_policy.delay(attempt, retry_after(e)))
+                attempt += 1
+                root.retries += 1
+                RETRIES_TOTAL.inc()
+                continue
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+            root.rate_limiter.recover()
+            root.breaker.record_success()
+            return response
     
-    def get_articles(self, num_pages: int) -> List[Dict]:
-        """Get articles from multiple pages with caching"""
+    async def _fetch_page(self, page: int) -> CacheEntry:
+        """Scrape a page within the fan-out limit and store it in the cache"""
+        self._bind_loop()
+        previous = self.cache.entry(page)
+        previous_fetched_at = previous.fetched_at if previous else None
+        deadline = time.monotonic() + REFRESH_LOCK_TIMEOUT
+        
+        # With a shared cache another worker may already be refreshing this
+        # page; wait for its result rather than scraping it a second time
+        while True:
+            locked = self.cache.acquire_refresh(page, REFRESH_LOCK_TIMEOUT)
+            entry = self.cache.entry(page)
+            if entry is not None and entry.fetched_at != previous_fetched_at:
+                if locked:
+                    self.cache.release_refresh(page)
+                return entry
+            if locked or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(REFRESH_POLL_INTERVAL)
+        
+        # Only a page that is still cached can be revalidated
+        validators = self._validators.get(page) if previous is not None else None
+        try:
+            async with self._semaphore:
+                articles = await self._scrape_page(page, validators)
+            if articles is None:
+                # Unchanged upstream: keep the parsed articles, only renew their age
+                self.refreshes["unchanged"] += 1
+                REFRESHES.inc(result="unchanged")
+                entry = CacheEntry(previous.articles, time.time())
+                if not self.cache.touch(page, entry.fetched_at):
+                    self.cache.put(page, entry.articles, entry.fetched_at)
+            else:
+                self.refreshes["changed"] += 1
+                REFRESHES.inc(result="changed")
+                entry = CacheEntry(articles, time.time())
+                self.cache.put(page, articles, entry.fetched_at)
+        finally:
+            self.cache.release_refresh(page)
+        return entry
+    
+    def _start_fetch(self, page: int) -> asyncio.Future:
+        """Return the in-flight fetch for a page, starting one if needed"""
+        self._bind_loop()
+        task = self._inflight.get(page)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_page(page))
+            self._inflight[page] = task
+            task.add_done_callback(lambda done: self._clear_inflight(page, done))
+        return task
+    
+    async def _get_page(self, page: int) -> CacheEntry:
+        """Fetch a missing page, sharing one upstream request between concurrent callers"""
+        # Shield the shared fetch so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(self._start_fetch(page))
+    
+    async def refresh_page(self, page: int) -> CacheEntry:
+        """Fetch a page now, whatever the age of its cached copy"""
+        return await self._get_page(page)
+    
+    def _clear_inflight(self, page: int, task: asyncio.Future):
+        """Forget a finished fetch so the next miss starts a new one"""
+        if self._inflight.get(page) is task:
+            del self._inflight[page]
+        # Background refreshes have nobody awaiting them, so mark any
+        # failure as retrieved; the stale page simply stays cached
+        if not task.cancelled():
+            task.exception()
+    
+    def validate_num_pages(self, num_pages: int):
+        """Reject page counts outside 1..MAX_PAGES"""
         if num_pages < 1 or num_pages > MAX_PAGES:
             raise HTTPException(
                 status_code=400,
                 detail=f"Number of pages must be between 1 and {MAX_PAGES}"
             )
-        
-        all_articles = []
+    
+    def validate_range(self, start: int, end: int):
+        """Reject page ranges outside 1..MAX_PAGES"""
+        if start < 1 or end < start or end > MAX_PAGES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Page range must satisfy 1 <= start <= end <= {MAX_PAGES}"
+            )
+    
+    def validate_window(self, offset: int, limit: int):
+        """Reject article windows that reach past page MAX_PAGES"""
+        max_articles = MAX_PAGES * ARTICLES_PER_PAGE
+        if offset < 0 or limit < 1 or offset + limit > max_articles:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Offset and limit must select articles within the first {max_articles}"
+            )
+    
+    def _lookup_page(self, page: int) -> Optional[CacheEntry]:
+        """Return a servable cached page, or None if it must be fetched first.
+
+        Fresh pages are served as is, stale ones are served while a
+        background task refreshes them, and missing or expired ones must be
+        fetched before responding.
+        """
+        entry = self.cache.lookup(page)
+        breaker = self.root.breaker
+        if entry is not None and breaker.is_open:
+            # Upstream is down: any cached version beats an error, and the
+            # breaker's probe decides when to refresh again
+            if breaker.state == CircuitBreaker.HALF_OPEN:
+                self._start_fetch(page)
+            return entry
+        if entry is None or entry.age >= self.feed.max_age:
+            return None
+        if entry.age >= self.feed.ttl:
+            self._start_fetch(page)
+        return entry
+    
+    async def _get_entries(self, start: int, end: int, consistent: bool = False) -> List[CacheEntry]:
+        """Get the cache entries of pages start..end, fetching as needed.
+
+        With consistent, pages fetched more than RANGE_MAX_SKEW seconds ago
+        are refetched together with the rest, so the range reflects a single
+        moment of the ranking.
+        """
+        self.demand.record(start, end)
+        cached = {}
         pages_to_fetch = []
+        cutoff = time.time() - RANGE_MAX_SKEW
         
         # Check which pages need to be fetched
-        for page in range(1, num_pages + 1):
-            if page in self.cache:
-                all_articles.extend(self.cache[page])
-            else:
+        for page in range(start, end + 1):
+            entry = self._lookup_page(page)
+            if entry is None or (consistent and entry.fetched_at < cutoff):
                 pages_to_fetch.append(page)
+            else:
+                cached[page] = entry
+        
+        # Fetch only the pages not in cache, concurrently. Pages already being
+        # fetched for another request are awaited instead of fetched again.
+        # Every fetch runs to completion and successful pages are cached even
+        # if another page fails, so a retry only refetches the failed ones.
+        # The first failure in page order is then raised.
+        results = await asyncio.gather(
+            *(self._get_page(page) for page in pages_to_fetch),
+            return_exceptions=True
+        )
+        for page, result in zip(pages_to_fetch, results):
+            if isinstance(result, BaseException):
+                raise result
+            cached[page] = result
+        
+        # Reassemble in page order
+        return [cached[page] for page in range(start, end + 1)]
+    
+    async def iter_pages(self, num_pages: int) -> AsyncIterator[List[Article]]:
+        """Yield the articles of pages 1..num_pages in order, each as soon as it is available.
+
+        Only a window of upcoming pages is fetched ahead of the consumer, so
+        memory stays flat however many pages are requested.
+        """
+        self.validate_num_pages(num_pages)
+        self.demand.record(1, num_pages)
+        
+        upcoming = {}
+        seen = set()
+        for page in range(1, num_pages + 1):
+            for ahead in range(page, min(page + self.feed.concurrency, num_pages + 1)):
+                if ahead not in upcoming:
+                    upcoming[ahead] = self._lookup_page(ahead) or self._start_fetch(ahead)
+            entry = upcoming.pop(page)
+            if not isinstance(entry, CacheEntry):
+                entry = await asyncio.shield(entry)
+            yield unique_articles(entry.articles, seen)
+    
+    async def get_articles(self, num_pages: int, consistent: bool = False) -> List[Dict]:
+        """Get articles from multiple pages with caching"""
+        self.validate_num_pages(num_pages)
+        with ASSEMBLE_SECONDS.time(view="articles"):
+            entries = await self._get_entries(1, num_pages, consistent)
+        seen = set()
+        return [
+            article.to_dict()
+            for entry in entries
+            for article in unique_articles(entry.articles, seen)
+        ]
+    
+    async def get_articles_json(self, num_pages: int, consistent: bool = False) -> EncodedBody:
+        """Get the articles of pages 1..num_pages as pre-encoded JSON with an ETag"""
+        self.validate_num_pages(num_pages)
+        return await self.get_range_json(1, num_pages, consistent)
+    
+    async def get_range_json(self, start: int, end: int, consistent: bool = False) -> EncodedBody:
+        """Get the articles of pages start..end as pre-encoded JSON with an ETag.
+
+        Only the pages in the range are fetched, so page 7 doesn't cost pages 1-6.
+        Stories listed on more than one page are only included once.
+        """
+        self.validate_range(start, end)
+        with ASSEMBLE_SECONDS.time(view="range"):
+            entries = await self._get_entries(start, end, consistent)
+        versions = tuple(entry.fetched_at for entry in entries)
         
-        # Fetch only the pages not in cache
-        for page in pages_to_fetch:
-            articles = self.scrape_page(page)
-            self.cache[page] = articles
-            all_articles.extend(articles)
+        # Only the hottest, smallest prefixes are kept; other ranges are cheap
+        # to join from their pages and would multiply memory use
+        keep = start == 1 and end <= ENCODED_PREFIX_MAX_PAGES
+        cached = self._encoded_prefixes.get(end) if keep else None
+        if cached is not None and cached[0] == versions:
+            return cached[1]
         
-        return all_articles
+        with ENCODE_SECONDS.time(view="range"):
+            seen = set()
+            parts = []
+            for page, entry in enumerate(entries, start=start):
+                unique = unique_articles(entry.articles, seen)
+                # Pages without duplicates reuse their encoding from the last fetch
+                if len(unique) == len(entry.articles):
+                    parts.append(self._encode_page(page, entry))
+                else:
+                    parts.append(dumps(unique))
+            body = join_arrays(parts)
+            encoded = EncodedBody(body, make_etag(body))
+        if keep:
+            self._encoded_prefixes[end] = (versions, encoded)
+        return encoded
+    
+    async def get_window_json(self, offset: int, limit: int, consistent: bool = False) -> EncodedBody:
+        """Get limit articles starting at position offset of the listing, as JSON with an ETag.
+
+        Positions count each story once, as /N lists them, so consecutive
+        windows never repeat a story. The pages before the window are read
+        too (usually from the cache) to place it, and further pages are
+        fetched while repeated stories leave the window short.
+        """
+        self.validate_window(offset, limit)
+        end = (offset + limit - 1) // ARTICLES_PER_PAGE + 1
+        with ASSEMBLE_SECONDS.time(view="window"):
+            entries = await self._get_entries(1, end, consistent)
+            seen = set()
+            articles = [article for entry in entries for article in unique_articles(entry.articles, seen)]
+            # A short page is the end of the listing
+            while (
+                len(articles) < offset + limit and end < MAX_PAGES
+                and len(entries[-1].articles) >= ARTICLES_PER_PAGE
+            ):
+                end += 1
+                entries = await self._get_entries(end, end, consistent)
+                articles.extend(unique_articles(entries[0].articles, seen))
+        
+        with ENCODE_SECONDS.time(view="window"):
+            body = dumps(articles[offset:offset + limit])
+            return EncodedBody(body, make_etag(body))
+    
+    def search(
+        self,
+        query: Optional[str] = None,
+        user: Optional[str] = None,
+        min_points: Optional[int] = None,
+        min_comments: Optional[int] = None,
+        sort: str = "rank",
+        limit: int = ARTICLES_PER_PAGE
+    ) -> List[Dict]:
+        """Search the cached articles by title words, submitter, points and comments"""
+        if sort not in SORT_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sort must be one of: {', '.join(SORT_FIELDS)}"
+            )
+        max_results = MAX_PAGES * ARTICLES_PER_PAGE
+        if limit < 1 or limit > max_results:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Limit must be between 1 and {max_results}"
+            )
+        articles = self.index.search(query, user, min_points, min_comments, sort, limit)
+        return [article.to_dict() for article in articles]
+    
+    def get_history(
+        self,
+        item_id: int,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: int = HISTORY_MAX_RESULTS
+    ) -> Dict:
+        """Get a story's rank, points and comments recorded between since and until (unix times)"""
+        history = self.root.history
+        if history is None:
+            raise HTTPException(status_code=404, detail="History is disabled")
+        if limit < 1 or limit > HISTORY_MAX_RESULTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Limit must be between 1 and {HISTORY_MAX_RESULTS}"
+            )
+        records = history.query(item_id, since, until, limit)
+        if records is None:
+            raise HTTPException(status_code=404, detail=f"No history for item {item_id}")
+        feeds = {feed.namespace: feed.name for feed in FEEDS.values()}
+        return {
+            "id": str(item_id),
+            "history": [
+                {"time": timestamp, "feed": feeds.get(namespace), "rank": rank, "points": points, "comments": comments}
+                for timestamp, namespace, rank, points, comments in records
+            ]
+        }
+
+    def _encode_page(self, page: int, entry: CacheEntry) -> bytes:
+        """Return a page's articles as a JSON array, encoding it once per fetch"""
+        cached = self._encoded_pages.get(page)
+        if cached is not None and cached[0] == entry.fetched_at:
+            return cached[1]
+        body = dumps(entry.articles)
+        self._encoded_pages[page] = (entry.fetched_at, body)
+        return body
     
     def get_cache_status(self) -> Dict:
-        """Return information about the current cache state"""
+        """Return information about the current cache state, with a summary of the other feeds"""
+        root = self.root
         return {
             "cached_pages": list(self.cache.keys()),
             "total_articles": sum(len(articles) for articles in self.cache.values()),
-            "articles_per_page": {page: len(articles) for page, articles in self.cache.items()}
-        }
\ No newline at end of file
+            "articles_per_page": {page: len(articles) for page, articles in self.cache.items()},
+            "pages": {page: self._page_status(page) for page in self.cache},
+            "stats": self.cache.stats(),
+            "refreshes": dict(self.refreshes),
+            "upstream": {
+                "breaker": root.breaker.state,
+                "failures": root.breaker.failures,
+                "rate": root.rate_limiter.rate,
+                "retries": root.retries
+            },
+            "feeds": {
+                name: {"cached_pages": list(scraper.cache.keys()), "refreshes": dict(scraper.refreshes)}
+                for name, scraper in root._feeds.items() if scraper is not self
+            },
+            "history": root.history.stats() if root.history is not None else None
+        }
+    
+    def _page_status(self, page: int) -> Dict:
+        """Return the age and freshness of a cached page"""
+        age = self.cache.entry(page).age
+        if age < self.feed.ttl:
+            state = "fresh"
+        elif age < self.feed.max_age:
+            state = "stale"
+        else:
+            state = "expired"
+        return {"age_seconds": round(age, 1), "state": state}
@@ -0,0 +1,110 @@
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import List, Tuple
+from .cache import CacheBackend, CacheEntry
+from .config import CACHE_MAX_AGE
+from .feeds import feed_of
+from .encoding import dumps
+from .models import Article
+
+SNAPSHOT_VERSION = 1
+
+
+def _encode(entries: List[Tuple[int, CacheEntry]]) -> bytes:
+    """Serialize cache entries into compressed snapshot bytes"""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "pages": [
+            {"page": page, "fetched_at": entry.fetched_at, "articles": entry.articles}
+            for page, entry in entries
+        ]
+    }
+    return zlib.compress(dumps(snapshot))
+
+
+def _write(path: str, data: bytes):
+    """Atomically replace the snapshot file so a crash never leaves half a file.
+
+    Each write goes through its own temporary file, so workers saving the
+    same snapshot at once never write into each other's.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _entries(cache: CacheBackend) -> List[Tuple[int, CacheEntry]]:
+    return [(page, cache.entry(page)) for page in list(cache)]
+
+
+def save_snapshot(cache: CacheBackend, path: str):
+    """Write every cached page and its fetch time to the snapshot file"""
+    _write(path, _encode(_entries(cache)))
+
+
+async def save_snapshot_async(cache: CacheBackend, path: str):
+    """Save a snapshot, compressing and writing it outside the event loop"""
+    # Entries are collected on the loop; cached article lists are replaced
+    # rather than mutated, so the thread can serialize them safely
+    entries = _entries(cache)
+    await asyncio.to_thread(lambda: _write(path, _encode(entries)))
+
+
+def load_snapshot(cache: CacheBackend, path: str) -> int:
+    """Load pages from the snapshot file, skipping expired ones.
+
+    Pages keep their original fetch time, so stale ones are refreshed on
+    first use as usual, and each is dropped past its feed's max age. A
+    page the cache already holds as recent or newer is kept, so a worker
+    starting up never rolls back a cache shared with running workers.
+    Returns the number of pages loaded.
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = json.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, zlib.error):
+        # A corrupt or unreadable snapshot only costs a cold start
+        return 0
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return 0
+
+    loaded = 0
+    for page in snapshot["pages"]:
+        feed = feed_of(page["page"])
+        max_age = feed.max_age if feed is not None else CACHE_MAX_AGE
+        if time.time() - page["fetched_at"] >= max_age:
+            continue
+        current = cache.entry(page["page"])
+        if current is not None and current.fetched_at >= page["fetched_at"]:
+            continue
+        entry = CacheEntry([Article.from_dict(data) for data in page["articles"]], page["fetched_at"])
+        cache.put(page["page"], entry.articles, entry.fetched_at)
+        loaded += 1
+    return loaded
+
+
+async def snapshot_periodically(cache: CacheBackend, path: str, interval: float):
+    """Save a snapshot of the cache every interval seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await save_snapshot_async(cache, path)
+        except OSError:
+            # Keep serving; the next interval tries again
+            continue
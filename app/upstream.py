@@ -0,0 +1,154 @@
+import asyncio
+import random
+import time
+from typing import Optional
+import httpx
+
+# Statuses worth retrying: rate limiting and temporary server trouble
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+# Statuses asking us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Adaptive token bucket limiting outbound requests.
+
+    Allows bursts of up to burst requests, refilled at rate per second.
+    When upstream signals overload the rate is halved (down to min_rate),
+    and every successful request wins back a tenth of the configured rate.
+    Only monotonic time and sleeps are used, so one bucket works across
+    event loops.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def throttle(self):
+        """Halve the rate after upstream pushed back"""
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        """Raise the rate back towards its configured value"""
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient upstream errors"""
+
+    def __init__(self, retries: int, base_delay: float, max_delay: float):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number attempt (from 0), honouring Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Stops calling upstream after repeated failures.
+
+    Closed: requests flow. After failure_threshold consecutive failed
+    fetches it opens and requests fail fast for reset_timeout seconds.
+    Then it is half-open: one probe is let through, which closes it on
+    success or reopens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def is_open(self) -> bool:
+        """Whether upstream is considered down (no probe has succeeded yet)"""
+        return self._opened_at is not None
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a fetch may go upstream now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of fetching while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"circuit open, retrying upstream in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of a failed response, if given in seconds"""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
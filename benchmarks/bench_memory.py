@@ -0,0 +1,60 @@
+"""Compare the memory held by cached pages as dicts and as Article records.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory
+"""
+import argparse
+import tracemalloc
+from pathlib import Path
+from app.config import BASE_URL
+from app.parsers import parse_articles_lxml
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def _copy(value):
+    """A private copy of a string, as each parse produced before interning"""
+    return value.encode().decode() if isinstance(value, str) else value
+
+
+def as_dicts(content: bytes):
+    """A page as the per-article dicts the cache used to hold"""
+    return [
+        {key: _copy(value) for key, value in article.to_dict().items()}
+        for article in parse_articles_lxml(content, BASE_URL)
+    ]
+
+
+def as_records(content: bytes):
+    """A page as the Article records the cache holds now"""
+    return parse_articles_lxml(content, BASE_URL)
+
+
+def measure(build, pages) -> int:
+    """Bytes allocated and still held after building every page"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(content) for content in pages]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert held
+    return after - before
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=300, help="number of cached pages to simulate")
+    args = arg_parser.parse_args()
+
+    fixtures = [path.read_bytes() for path in sorted(FIXTURES.glob("hn_page*.html"))]
+    pages = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+
+    dicts = measure(as_dicts, pages)
+    records = measure(as_records, pages)
+    print(f"dicts    {dicts / args.pages / 1024:7.1f} KiB/page")
+    print(f"records  {records / args.pages / 1024:7.1f} KiB/page  {1 - records / dicts:.0%} smaller")
+
+
+if __name__ == "__main__":
+    main()
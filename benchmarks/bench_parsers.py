@@ -0,0 +1,40 @@
+"""Compare the throughput of the HTML parser engines on recorded pages.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parsers
+"""
+import argparse
+import time
+from pathlib import Path
+from app.config import BASE_URL
+from app.parsers import PARSERS
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def bench(engine: str, pages, rounds: int) -> float:
+    """Return the pages parsed per second by an engine"""
+    parser = PARSERS[engine]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in pages:
+            parser(content, BASE_URL)
+    return rounds * len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    pages = [path.read_bytes() for path in sorted(FIXTURES.glob("hn_page*.html"))]
+    results = {engine: bench(engine, pages, args.rounds) for engine in PARSERS}
+
+    baseline = results["html.parser"]
+    for engine, pages_per_second in results.items():
+        print(f"{engine:12} {pages_per_second:8.1f} pages/s  {pages_per_second / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark parsing, /N latency, concurrent throughput and cache memory, and write a JSON report.
+
+Recorded pages are replayed by a local stand-in for Hacker News with a
+configurable latency, and requests go to the ASGI app in process. Run from
+the repository root:
+
+    python -m benchmarks.suite --output report.json
+    python -m benchmarks.suite --output new.json --compare report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import httpx
+
+# Replayed fixture stories must not end up in a local server's history log
+os.environ["HISTORY_PATH"] = ""
+
+from app import config
+from app.dependencies import get_scraper, reset_scraper
+from app.main import app
+from app.parsers import PARSERS
+from app.upstream import TokenBucket
+from benchmarks.bench_memory import as_records, measure
+from benchmarks.bench_parsers import bench
+from tests.fake_upstream import FakeUpstream
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+REPORT_VERSION = 1
+
+_ROW_ID = re.compile(rb'(<tr class="athing[^"]*" id=")(\d+)')
+
+
+def build_pages(count: int) -> Dict[int, bytes]:
+    """Pages 1..count cycled from the fixtures, with item ids made unique per page"""
+    fixtures = [path.read_bytes() for path in sorted(FIXTURES.glob("hn_page*.html"))]
+    pages = {}
+    for page in range(1, count + 1):
+        content = fixtures[(page - 1) % len(fixtures)]
+        pages[page] = _ROW_ID.sub(lambda match: match.group(1) + str(int(match.group(2)) + page).encode(), content)
+    return pages
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99 and mean of latencies, in milliseconds"""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p90_ms": round(cuts[89] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def fresh_scraper(upstream: FakeUpstream):
+    """A scraper with an empty cache reading from the stand-in"""
+    reset_scraper()
+    scraper = get_scraper()
+    scraper.base_url = upstream.url
+    # The stand-in is local; don't let the politeness limit skew timings
+    scraper.rate_limiter = TokenBucket(rate=1e9, burst=10**9, min_rate=1e9)
+    return scraper
+
+
+async def bench_latency(upstream: FakeUpstream, num_pages: int, samples: int) -> Dict:
+    """Latency of GET /N with an empty cache (every page fetched) and with a warm one"""
+    transport = httpx.ASGITransport(app=app)
+    scraper = fresh_scraper(upstream)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up the connection pool and parser pool, which a running
+        # server has already started
+        (await client.get(f"/{num_pages}")).raise_for_status()
+
+        cold = []
+        for _ in range(samples):
+            scraper.cache.clear()
+            start = time.perf_counter()
+            response = await client.get(f"/{num_pages}")
+            cold.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+        warm = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            response = await client.get(f"/{num_pages}")
+            warm.append(time.perf_counter() - start)
+        await scraper.close()
+    return {"pages": num_pages, "cold": percentiles(cold), "warm": percentiles(warm)}
+
+
+async def bench_throughput(upstream: FakeUpstream, num_pages: int, clients: int, duration: float) -> Dict:
+    """Requests per second of concurrent clients polling /N against a warm cache"""
+    scraper = fresh_scraper(upstream)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.get(f"/{num_pages}")).raise_for_status()
+        latencies = []
+        deadline = time.perf_counter() + duration
+
+        async def poll():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(f"/{num_pages}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(poll() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    await scraper.close()
+    return {
+        "pages": num_pages,
+        "clients": clients,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency": percentiles(latencies),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> Dict:
+    pages = build_pages(config.MAX_PAGES)
+    fixtures = list(pages.values())[:2]
+    report = {
+        "version": REPORT_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "parser_engine": config.PARSER_ENGINE,
+            "parse_executor": config.PARSE_EXECUTOR,
+            "upstream_latency_ms": args.latency * 1000,
+        },
+        "results": {
+            "parse_pages_per_second": {
+                engine: round(bench(engine, fixtures, args.rounds), 1) for engine in PARSERS
+            },
+            "memory_kib_per_page": round(measure(as_records, list(pages.values()) * 10) / (len(pages) * 10) / 1024, 1),
+        },
+    }
+    with FakeUpstream(pages, latency=args.latency) as upstream:
+        report["results"]["latency"] = asyncio.run(bench_latency(upstream, args.num_pages, args.samples))
+        report["results"]["throughput"] = asyncio.run(
+            bench_throughput(upstream, args.num_pages, args.clients, args.duration)
+        )
+    reset_scraper()
+    return report
+
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    """Numeric results keyed by dotted path, for comparing reports"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(report: Dict, baseline: Dict):
+    """Print each result next to the baseline's and the ratio between them"""
+    current, previous = flatten(report["results"]), flatten(baseline["results"])
+    print(f"{'metric':45} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for path, value in current.items():
+        if path not in previous:
+            continue
+        ratio = value / previous[path] if previous[path] else float("inf")
+        print(f"{path:45} {previous[path]:12.3f} {value:12.3f} {ratio:6.2f}x")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--output", help="write the JSON report to this file")
+    arg_parser.add_argument("--compare", help="baseline JSON report to compare against")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="stand-in response latency in seconds")
+    arg_parser.add_argument("--num-pages", type=int, default=3, help="N of the /N requests")
+    arg_parser.add_argument("--samples", type=int, default=30, help="requests per latency measurement")
+    arg_parser.add_argument("--clients", type=int, default=32, help="concurrent clients for throughput")
+    arg_parser.add_argument("--duration", type=float, default=5.0, help="seconds of throughput measurement")
+    arg_parser.add_argument("--rounds", type=int, default=20, help="parse rounds per engine")
+    args = arg_parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
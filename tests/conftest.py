@@ -0,0 +1,59 @@
+import os
+
+# Parse inline so tests don't start a pool of parser processes for every
+# scraper; tests that exercise the pools select them explicitly
+os.environ.setdefault("PARSE_EXECUTOR", "inline")
+
+# Tests that start the app lifespan count upstream requests; the crawler is
+# exercised directly in tests/test_crawler.py
+os.environ.setdefault("CRAWLER_ENABLED", "0")
+
+# Scrapers don't write to the history log, even where the environment
+# (e.g. docker compose) configures one; tests/test_history.py gives its
+# scrapers a log in a temporary directory
+os.environ["HISTORY_PATH"] = ""
+
+# Tests that start the app lifespan mustn't load or overwrite a configured
+# snapshot; tests/test_cache.py patches in a temporary one where needed
+os.environ.pop("SNAPSHOT_PATH", None)
+
+import asyncio
+import pytest
+from app.cache import PageCache
+from app.models import Article
+from app.scraper import HackerNewsScraper
+from tests.fake_upstream import FakeUpstream
+
+
+def make_article(title, points=0, comments=0, sent_by="unknown", id=None):
+    return Article(title, "https://example.com", points, sent_by, None, comments, id)
+
+
+def make_story(item_id, **fields):
+    """An article with a Hacker News item id, titled after it"""
+    return make_article(f"Story {item_id}", id=str(item_id), **fields)
+
+
+def run(scraper, coroutine):
+    """Run a coroutine and close the scraper's client on the same loop"""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await scraper.close()
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def upstream():
+    with FakeUpstream() as upstream:
+        yield upstream
+
+
+@pytest.fixture
+def scraper(upstream):
+    """A scraper with its own in-memory cache, reading from the fake upstream"""
+    scraper = HackerNewsScraper(PageCache())
+    scraper.base_url = upstream.url
+    yield scraper
+    asyncio.run(scraper.close())
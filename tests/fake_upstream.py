@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeUpstream:
+    """Local stand-in for news.ycombinator.com serving the recorded fixture pages.
+
+    Failures are scripted with fail(): queued statuses are answered, in
+    order, before pages are served again. Every request is recorded (its
+    page, and its path in paths), and answered after latency seconds.
+    Every path serves the same pages.
+    """
+
+    def __init__(self, pages: Optional[Dict[int, bytes]] = None, latency: float = 0):
+        self.pages = pages or {
+            1: (FIXTURES / "hn_page1.html").read_bytes(),
+            2: (FIXTURES / "hn_page2.html").read_bytes(),
+        }
+        self.latency = latency
+        self.requests: List[int] = []
+        self.paths: List[str] = []
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/news"
+
+    def fail(self, status: int, times: int = 1, retry_after: Optional[int] = None):
+        """Answer the next times requests with status"""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                page = int(parse_qs(url.query).get("p", ["1"])[0])
+                with upstream._lock:
+                    upstream.requests.append(page)
+                    upstream.paths.append(url.path)
+                    failure = upstream._failures.popleft() if upstream._failures else None
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+                if failure is not None:
+                    status, retry_after = failure
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", str(retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = upstream.pages.get(page, b"<html><body></body></html>")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "FakeUpstream":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
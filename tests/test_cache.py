@@ -1,9 +1,20 @@
+import asyncio
+import json
+import os
 import pytest
-from unittest.mock import patch, Mock
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, Mock, AsyncMock
 from fastapi.testclient import TestClient
 from app.main import app
 from app.dependencies import get_scraper
 from app.dependencies import reset_scraper
+from app.config import CACHE_TTL, CACHE_MAX_AGE
+from app.cache import PageCache, SQLiteCache, approx_size
+from app.scraper import HackerNewsScraper
+from app.snapshot import save_snapshot, load_snapshot
+from app.feeds import FEEDS
+from app.parsers import parse_articles
+from tests.conftest import make_article
 
 client = TestClient(app)
 
@@ -35,7 +46,7 @@ class TestScraperCache:
         </tr>
         """
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_cache_stores_pages(self, mock_get, scraper, mock_html_response):
         """Test that pages are stored in cache after being fetched"""
         mock_response = Mock()
@@ -44,13 +55,13 @@ class TestScraperCache:
         mock_get.return_value = mock_response
         
         # Initial request should populate cache
-        scraper.get_articles(1)
+        asyncio.run(scraper.get_articles(1))
         
         # Verify cache contains page 1
         assert 1 in scraper.cache
         assert len(scraper.cache[1]) > 0
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_cached_pages_not_fetched_again(self, mock_get, scraper, mock_html_response):
         """Test that cached pages aren't fetched again"""
         mock_response = Mock()
@@ -59,15 +70,15 @@ class TestScraperCache:
         mock_get.return_value = mock_response
         
         # First request - should make an HTTP request
-        scraper.get_articles(1)
+        asyncio.run(scraper.get_articles(1))
         assert mock_get.call_count == 1
         
         # Second request for same page - should use cache
-        scraper.get_articles(1)
+        asyncio.run(scraper.get_articles(1))
         # Call count should still be 1 since no new request was made
         assert mock_get.call_count == 1
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_only_missing_pages_fetched(self, mock_get, scraper, mock_html_response):
         """Test that only missing pages are fetched"""
         mock_response = Mock()
@@ -76,21 +87,21 @@ class TestScraperCache:
         mock_get.return_value = mock_response
         
         # First request - page 1
-        scraper.get_articles(1)
+        asyncio.run(scraper.get_articles(1))
         assert mock_get.call_count == 1
         assert mock_get.call_args[0][0] == "https://news.ycombinator.com?p=1"
         
         # Second request - pages 1-3
-        scraper.get_articles(3)
+        asyncio.run(scraper.get_articles(3))
         # Should make 2 new requests (for pages 2 and 3)
         assert mock_get.call_count == 3
         
         # Third request - pages 1-4
-        scraper.get_articles(4)
+        asyncio.run(scraper.get_articles(4))
         # Should make 1 new request (for page 4)
         assert mock_get.call_count == 4
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_cache_status_endpoint(self, mock_get, mock_html_response):
         """Test that cache status endpoint returns correct information"""
         # Setup mock response
@@ -117,18 +128,18 @@ class TestScraperCache:
     def test_get_cache_status(self, scraper):
         """Test that get_cache_status returns correct structure"""
         # Manually populate cache
-        scraper.cache = {
-            1: [{"title": "Article 1"}, {"title": "Article 2"}],
-            2: [{"title": "Article 3"}]
-        }
+        scraper.cache[1] = [make_article("Article 1"), make_article("Article 2")]
+        scraper.cache[2] = [make_article("Article 3")]
         
         cache_status = scraper.get_cache_status()
         
         assert cache_status["cached_pages"] == [1, 2]
         assert cache_status["total_articles"] == 3
         assert cache_status["articles_per_page"] == {1: 2, 2: 1}
+        assert cache_status["pages"][1]["state"] == "fresh"
+        assert cache_status["pages"][1]["age_seconds"] < CACHE_TTL
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_cache_doesnt_persist_after_restart(self, mock_get, mock_html_response):
         """Test that cache is empty after application restart"""
         mock_response = Mock()
@@ -138,7 +149,7 @@ class TestScraperCache:
         
         # Create first scraper instance and populate cache
         first_scraper = get_scraper()
-        first_scraper.get_articles(2)
+        asyncio.run(first_scraper.get_articles(2))
         
         # Verify cache is populated
         assert len(first_scraper.cache) > 0
@@ -153,5 +164,730 @@ class TestScraperCache:
         assert len(new_scraper.cache) == 0
         
         # Verify we need to make new requests after restart
-        new_scraper.get_articles(1)
+        asyncio.run(new_scraper.get_articles(1))
         assert mock_get.call_count > 0
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_concurrent_misses_share_one_fetch_per_page(self, mock_get, scraper, mock_html_response):
+        """Test that concurrent requests for the same missing pages fetch each page once"""
+        async def slow_get(url):
+            await asyncio.sleep(0.05)
+            mock_response = Mock()
+            # A distinct story per page, so none is deduplicated
+            mock_response.content = mock_html_response.replace('id="12345"', f'id="{url}"')
+            mock_response.raise_for_status.return_value = None
+            return mock_response
+        
+        mock_get.side_effect = slow_get
+        
+        async def fire_requests():
+            return await asyncio.gather(*(scraper.get_articles(5) for _ in range(200)))
+        
+        results = asyncio.run(fire_requests())
+        
+        assert all(len(articles) == 5 for articles in results)
+        assert mock_get.call_count == 5
+        fetched_urls = sorted(call.args[0] for call in mock_get.call_args_list)
+        assert fetched_urls == [f"https://news.ycombinator.com?p={page}" for page in range(1, 6)]
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_failed_shared_fetch_is_retried_on_next_miss(self, mock_get, scraper, mock_html_response):
+        """Test that a failed in-flight fetch is not reused by later requests"""
+        mock_response = Mock()
+        mock_response.content = mock_html_response
+        mock_response.raise_for_status.return_value = None
+        mock_get.side_effect = [Exception("Network error"), mock_response]
+        
+        with pytest.raises(Exception):
+            asyncio.run(scraper.get_articles(1))
+        
+        asyncio.run(scraper.get_articles(1))
+        assert mock_get.call_count == 2
+        assert 1 in scraper.cache
+
+
+
+class TestCacheExpiry:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+    
+    @pytest.fixture
+    def scraper(self):
+        return get_scraper()
+    
+    @staticmethod
+    def response_with_title(title):
+        mock_response = Mock()
+        mock_response.content = f"""
+        <tr class="athing" id="1">
+            <td><span class="titleline"><a href="https://example.com">{title}</a></span></td>
+        </tr>
+        """
+        mock_response.raise_for_status.return_value = None
+        return mock_response
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_stale_page_served_while_refreshed_in_background(self, mock_get, scraper):
+        """Test that a stale page is returned immediately and refreshed afterwards"""
+        scraper.cache[1] = [make_article("Old")]
+        scraper.cache.entry(1).fetched_at -= CACHE_TTL + 1
+        mock_get.return_value = self.response_with_title("New")
+        
+        async def request_and_settle():
+            articles = await scraper.get_articles(1)
+            await asyncio.gather(*scraper._inflight.values())
+            return articles
+        
+        articles = asyncio.run(request_and_settle())
+        
+        assert articles == [make_article("Old").to_dict()]
+        assert mock_get.call_count == 1
+        assert scraper.cache[1][0].title == "New"
+        assert scraper.get_cache_status()["pages"][1]["state"] == "fresh"
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_expired_page_refetched_before_responding(self, mock_get, scraper):
+        """Test that a page past the max age blocks on a fresh fetch"""
+        scraper.cache[1] = [make_article("Old")]
+        scraper.cache.entry(1).fetched_at -= CACHE_MAX_AGE + 1
+        assert scraper.get_cache_status()["pages"][1]["state"] == "expired"
+        mock_get.return_value = self.response_with_title("New")
+        
+        articles = asyncio.run(scraper.get_articles(1))
+        
+        assert articles[0]["title"] == "New"
+        assert mock_get.call_count == 1
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_failed_background_refresh_keeps_stale_page(self, mock_get, scraper):
+        """Test that a failing background refresh leaves the stale page cached"""
+        scraper.cache[1] = [make_article("Old")]
+        scraper.cache.entry(1).fetched_at -= CACHE_TTL + 1
+        mock_get.side_effect = Exception("Network error")
+        
+        async def request_and_settle():
+            articles = await scraper.get_articles(1)
+            await asyncio.gather(*scraper._inflight.values(), return_exceptions=True)
+            return articles
+        
+        articles = asyncio.run(request_and_settle())
+        
+        assert articles == [make_article("Old").to_dict()]
+        assert scraper.cache[1] == [make_article("Old")]
+        assert scraper.get_cache_status()["pages"][1]["state"] == "stale"
+
+
+
+class TestPageCache:
+    def test_lru_evicts_least_recently_used_page(self):
+        """Test that the LRU policy evicts the page used longest ago"""
+        cache = PageCache(max_entries=2, policy="lru")
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        cache.lookup(1)
+        cache[3] = [make_article("Article 3")]
+        
+        assert sorted(cache.keys()) == [1, 3]
+        assert cache.stats()["evictions"] == 1
+    
+    def test_lfu_evicts_least_frequently_used_page(self):
+        """Test that the LFU policy evicts the page used least often"""
+        cache = PageCache(max_entries=2, policy="lfu")
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        cache.lookup(1)
+        cache.lookup(2)
+        cache.lookup(2)
+        cache[3] = [make_article("Article 3")]
+        
+        assert sorted(cache.keys()) == [2, 3]
+    
+    def test_byte_bound_evicts_until_within_budget(self):
+        """Test that pages are evicted once the approximate size exceeds the budget"""
+        page = [{"title": "x" * 1000}]
+        cache = PageCache(max_bytes=approx_size(page) * 2)
+        for number in range(1, 5):
+            cache[number] = [{"title": "x" * 1000}]
+        
+        assert sorted(cache.keys()) == [3, 4]
+        assert cache.stats()["bytes"] <= cache.max_bytes
+        assert cache.stats()["evictions"] == 2
+    
+    def test_newest_page_kept_even_if_over_budget(self):
+        """Test that a single page larger than the budget is still cached"""
+        cache = PageCache(max_bytes=1)
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        
+        assert list(cache.keys()) == [2]
+    
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError):
+            PageCache(policy="fifo")
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_cache_endpoint_reports_counters(self, mock_get):
+        """Test that hit and miss counters are reported by /cache"""
+        reset_scraper()
+        mock_response = Mock()
+        mock_response.content = '<tr class="athing" id="1"><td><span class="titleline"><a href="https://example.com">A</a></span></td></tr>'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        client.get("/1")
+        client.get("/2")
+        
+        stats = client.get("/cache").json()["stats"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 0
+
+
+
+class TestSQLiteCache:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "cache.sqlite3")
+    
+    def test_pages_and_counters_shared_between_instances(self, path):
+        """Test that two workers opening the same file see the same cache"""
+        first = SQLiteCache(path)
+        second = SQLiteCache(path)
+        first[1] = [make_article("Article 1")]
+        
+        assert second[1] == [make_article("Article 1")]
+        assert second.lookup(1).articles == [make_article("Article 1")]
+        assert second.lookup(2) is None
+        # Counters are batched until the next flush
+        second.flush_usage()
+        assert first.stats()["hits"] == 1
+        assert first.stats()["misses"] == 1
+        assert list(first.keys()) == [1]
+    
+    def test_lru_eviction(self, path):
+        """Test that the shared cache evicts the least recently used page"""
+        cache = SQLiteCache(path, max_entries=2)
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        cache.lookup(1)
+        cache[3] = [make_article("Article 3")]
+        
+        assert sorted(cache.keys()) == [1, 3]
+        assert cache.stats()["evictions"] == 1
+    
+    def test_warm_lookups_neither_decode_nor_write(self, path):
+        """Test that repeated hits reuse the decoded page and batch their bookkeeping"""
+        writer = SQLiteCache(path)
+        reader = SQLiteCache(path, usage_flush_interval=60)
+        writer[1] = [make_article("Article 1")]
+        first = reader.lookup(1)
+        changes = reader._db.total_changes
+        
+        for _ in range(100):
+            assert reader.lookup(1) is first
+        assert reader._db.total_changes == changes
+        
+        # Another worker's newer version is decoded on the next lookup
+        writer[1] = [make_article("Article 1b")]
+        assert reader.lookup(1).articles == [make_article("Article 1b")]
+        
+        stats = reader.stats()
+        assert stats["hits"] == 102
+        assert reader._db.execute("SELECT uses FROM pages WHERE page = 1").fetchone()[0] == 1 + 102
+
+    def test_scraper_close_flushes_batched_usage(self, path):
+        """Test that closing the scraper writes the store's pending counters and reopens it on the next use"""
+        scraper = HackerNewsScraper(SQLiteCache(path, usage_flush_interval=60))
+        scraper.store[1] = [make_article("Article 1")]
+        for _ in range(3):
+            scraper.store.lookup(1)
+
+        asyncio.run(scraper.close())
+
+        other = SQLiteCache(path)
+        assert other.stats()["hits"] == 3
+        assert other._db.execute("SELECT uses FROM pages WHERE page = 1").fetchone()[0] == 1 + 3
+        assert scraper.store.lookup(1).articles == [make_article("Article 1")]
+
+    def test_refresh_lock_held_by_one_worker(self, path):
+        """Test that only one worker holds a page's refresh lock until it expires or is released"""
+        first = SQLiteCache(path)
+        second = SQLiteCache(path)
+        
+        assert first.acquire_refresh(1, timeout=60)
+        assert not second.acquire_refresh(1, timeout=60)
+        assert second.acquire_refresh(2, timeout=60)
+        
+        first.release_refresh(1)
+        assert second.acquire_refresh(1, timeout=60)
+        
+        # An expired lease is taken over
+        assert first.acquire_refresh(3, timeout=0)
+        assert second.acquire_refresh(3, timeout=60)
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_workers_sharing_cache_fetch_each_page_once(self, mock_get, path):
+        """Test that concurrent misses from two workers trigger one upstream fetch per page"""
+        async def slow_get(url):
+            await asyncio.sleep(0.05)
+            mock_response = Mock()
+            mock_response.content = f'<tr class="athing" id="{url}"><td><span class="titleline"><a href="https://example.com">A</a></span></td></tr>'
+            mock_response.raise_for_status.return_value = None
+            return mock_response
+        
+        mock_get.side_effect = slow_get
+        workers = [HackerNewsScraper(SQLiteCache(path)) for _ in range(2)]
+        
+        async def fire_requests():
+            return await asyncio.gather(*(worker.get_articles(3) for worker in workers))
+        
+        results = asyncio.run(fire_requests())
+        
+        assert all(len(articles) == 3 for articles in results)
+        assert mock_get.call_count == 3
+
+
+
+class TestCacheSnapshot:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+    
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "cache.snapshot")
+    
+    def test_snapshot_round_trip_keeps_fetch_times(self, path):
+        """Test that a reloaded snapshot restores pages with their original age"""
+        cache = PageCache()
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        cache.entry(2).fetched_at -= CACHE_TTL + 1
+        save_snapshot(cache, path)
+        
+        restored = PageCache()
+        assert load_snapshot(restored, path) == 2
+        
+        assert restored[1] == [make_article("Article 1")]
+        assert restored.entry(2).fetched_at == cache.entry(2).fetched_at
+    
+    def test_expired_pages_not_loaded(self, path):
+        """Test that pages past the max age are dropped on load"""
+        cache = PageCache()
+        cache[1] = [make_article("Article 1")]
+        cache[2] = [make_article("Article 2")]
+        cache.entry(2).fetched_at -= CACHE_MAX_AGE + 1
+        save_snapshot(cache, path)
+        
+        restored = PageCache()
+        assert load_snapshot(restored, path) == 1
+        assert list(restored.keys()) == [1]
+    
+    def test_newer_shared_pages_not_rolled_back(self, path, tmp_path):
+        """Test that a worker loading an older snapshot keeps the newer pages other workers stored"""
+        old = PageCache()
+        old[1] = [make_article("old")]
+        old.entry(1).fetched_at -= 100
+        old[2] = [make_article("old 2")]
+        old.entry(2).fetched_at -= 100
+        save_snapshot(old, path)
+        
+        running = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        running[1] = [make_article("new")]
+        starting = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        
+        assert load_snapshot(starting, path) == 1
+        assert running[1] == [make_article("new")]
+        assert running[2] == [make_article("old 2")]
+    
+    def test_pages_expire_by_their_feed_max_age(self, path):
+        """Test that each feed's pages are kept or dropped by that feed's max age"""
+        age = 2 * 3600 - 60
+        cache = PageCache()
+        for feed in ("news", "newest", "jobs"):
+            key = FEEDS[feed].key_offset + 1
+            cache[key] = [make_article(feed)]
+            cache.entry(key).fetched_at -= min(age, FEEDS[feed].max_age + 1)
+        save_snapshot(cache, path)
+        
+        restored = PageCache()
+        assert load_snapshot(restored, path) == 1
+        assert list(restored.keys()) == [FEEDS["jobs"].key_offset + 1]
+    
+    def test_missing_or_corrupt_snapshot_starts_cold(self, path):
+        assert load_snapshot(PageCache(), path) == 0
+        
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot")
+        assert load_snapshot(PageCache(), path) == 0
+    
+    def test_concurrent_saves_use_separate_temp_files(self, path):
+        """Test that workers saving the same snapshot at once leave one complete file"""
+        cache = PageCache()
+        for page in range(1, 11):
+            cache[page] = [make_article(f"Article {page}-{i}") for i in range(30)]
+        
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: save_snapshot(cache, path), range(32)))
+        
+        assert load_snapshot(PageCache(), path) == 10
+        assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+    
+    def test_failed_save_on_shutdown_still_closes_scraper(self, path):
+        """Test that the scraper is closed even if the final snapshot can't be written"""
+        with patch('app.main.SNAPSHOT_PATH', path), \
+                patch('app.main.save_snapshot_async', new_callable=AsyncMock, side_effect=OSError("disk full")):
+            with TestClient(app):
+                assert get_scraper()._client is not None
+        
+        assert get_scraper()._client is None
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_restart_serves_from_snapshot(self, mock_get, path):
+        """Test that the app saves its cache on shutdown and serves it after a restart"""
+        async def get(url, **kwargs):
+            mock_response = Mock()
+            mock_response.content = f'<tr class="athing" id="{url}"><td><span class="titleline"><a href="https://example.com">A</a></span></td></tr>'
+            mock_response.raise_for_status.return_value = None
+            return mock_response
+        mock_get.side_effect = get
+        
+        with patch('app.main.SNAPSHOT_PATH', path):
+            with TestClient(app) as first_run:
+                first_run.get("/2")
+            assert mock_get.call_count == 2
+            
+            reset_scraper()
+            with TestClient(app) as second_run:
+                response = second_run.get("/2")
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert mock_get.call_count == 2
+
+
+class TestEncodedResponses:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+    
+    @pytest.fixture
+    def mock_get(self):
+        async def get(url, **kwargs):
+            mock_response = Mock()
+            mock_response.content = f'<tr class="athing" id="{url}"><td><span class="titleline"><a href="https://example.com">Café</a></span></td></tr>'
+            mock_response.raise_for_status.return_value = None
+            return mock_response
+        with patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = get
+            yield mock_get
+    
+    def test_encoded_body_matches_articles(self, mock_get):
+        """Test that the pre-encoded body decodes to the same articles as get_articles"""
+        scraper = get_scraper()
+        
+        encoded = asyncio.run(scraper.get_articles_json(3))
+        
+        assert json.loads(encoded.body) == asyncio.run(scraper.get_articles(3))
+        assert encoded.etag.startswith('"')
+    
+    def test_prefix_encoded_once_until_a_page_changes(self, mock_get):
+        """Test that a warm prefix is reused and rebuilt after a page refresh"""
+        scraper = get_scraper()
+        first = asyncio.run(scraper.get_articles_json(2))
+        
+        assert asyncio.run(scraper.get_articles_json(2)) is first
+        
+        scraper.cache[2] = [make_article("Changed")]
+        changed = asyncio.run(scraper.get_articles_json(2))
+        assert changed.etag != first.etag
+        assert json.loads(changed.body)[-1] == make_article("Changed").to_dict()
+    
+    def test_matching_etag_returns_not_modified(self, mock_get):
+        """Test that polling with the last ETag gets an empty 304"""
+        response = client.get("/")
+        etag = response.headers["ETag"]
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()[0]["title"] == "Café"
+        
+        not_modified = client.get("/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+        
+        assert client.get("/1", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+        assert client.get("/2", headers={"If-None-Match": etag}).status_code == 200
+        assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+class TestPageRanges:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+    
+    @pytest.fixture
+    def mock_get(self):
+        """Each page holds 30 articles titled '<page>-<position>'"""
+        async def get(url, **kwargs):
+            page = int(url.rsplit("p=", 1)[-1]) if "p=" in url else 1
+            response = Mock()
+            response.content = "".join(
+                f'<tr class="athing" id="{page}{i}"><td><span class="titleline">'
+                f'<a href="https://example.com">{page}-{i}</a></span></td></tr>'
+                for i in range(30)
+            )
+            response.raise_for_status.return_value = None
+            return response
+        with patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = get
+            yield mock_get
+    
+    def fetched_pages(self, mock_get):
+        return sorted(
+            int(call.args[0].rsplit("p=", 1)[-1]) if "p=" in call.args[0] else 1
+            for call in mock_get.call_args_list
+        )
+    
+    def test_single_page_fetches_only_that_page(self, mock_get):
+        """Test that page 7 is served without fetching pages 1-6"""
+        response = client.get("/pages?start=7")
+        
+        assert response.status_code == 200
+        assert response.json()[0]["title"] == "7-0"
+        assert len(response.json()) == 30
+        assert self.fetched_pages(mock_get) == [7]
+    
+    def test_range_reuses_cached_pages(self, mock_get):
+        """Test that a range only fetches the pages not already cached"""
+        client.get("/pages?start=3&end=4")
+        response = client.get("/pages?start=2&end=5")
+        
+        titles = [article["title"] for article in response.json()]
+        assert titles[0] == "2-0" and titles[-1] == "5-29"
+        assert self.fetched_pages(mock_get) == [2, 3, 4, 5]
+    
+    def test_window_spans_page_boundary(self, mock_get):
+        """Test that an offset/limit window reads the pages up to the ones it covers"""
+        response = client.get("/pages?offset=50&limit=20")
+        
+        titles = [article["title"] for article in response.json()]
+        assert titles == [f"2-{i}" for i in range(20, 30)] + [f"3-{i}" for i in range(10)]
+        assert self.fetched_pages(mock_get) == [1, 2, 3]
+        assert response.headers["Link"] == '</pages?offset=70&limit=20>; rel="next"'
+    
+    def test_windows_never_repeat_a_story(self, mock_get):
+        """Test that a story listed on pages 1 and 2 is served by the first window only"""
+        get = mock_get.side_effect
+        
+        async def shifted_get(url, **kwargs):
+            response = await get(url, **kwargs)
+            if "p=2" in url:
+                # The last story of page 1 moved down onto page 2
+                repeated = '<tr class="athing" id="129"><td><span class="titleline"><a href="https://example.com">1-29</a></span></td></tr>'
+                response.content = repeated + response.content
+            return response
+        
+        mock_get.side_effect = shifted_get
+        first = [article["title"] for article in client.get("/pages?offset=0&limit=30").json()]
+        second = [article["title"] for article in client.get("/pages?offset=30&limit=30").json()]
+        
+        assert first == [f"1-{i}" for i in range(30)]
+        assert second == [f"2-{i}" for i in range(30)]
+    
+    def test_last_window_has_no_next_link(self, mock_get):
+        """Test that the cursor stops at the last page"""
+        response = client.get("/pages?offset=270&limit=30")
+        
+        assert response.status_code == 200
+        assert "Link" not in response.headers
+    
+    def test_cursor_reaches_end_with_non_dividing_limit(self, mock_get):
+        """Test that following the cursor with a limit that doesn't divide 300 serves every article"""
+        url = "/pages?offset=0&limit=40"
+        titles = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            titles.extend(article["title"] for article in response.json())
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+        
+        assert len(titles) == 300
+        assert titles[-1] == "10-29"
+        assert response.request.url.query == b"offset=280&limit=20"
+    
+    def test_invalid_ranges_rejected(self, mock_get):
+        """Test that out-of-bounds or mixed pagination parameters are rejected"""
+        assert client.get("/pages?start=0").status_code == 400
+        assert client.get("/pages?start=5&end=4").status_code == 400
+        assert client.get("/pages?start=1&end=11").status_code == 400
+        assert client.get("/pages?offset=-1&limit=10").status_code == 400
+        assert client.get("/pages?offset=0&limit=0").status_code == 400
+        assert client.get("/pages?offset=290&limit=20").status_code == 400
+        assert client.get("/pages?start=1&limit=10").status_code == 400
+        mock_get.assert_not_called()
+
+
+class TestDeduplication:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+    
+    @pytest.fixture
+    def scraper(self):
+        return get_scraper()
+    
+    def row(self, item_id, title):
+        return (
+            f'<tr class="athing" id="{item_id}"><td><span class="titleline">'
+            f'<a href="https://example.com">{title}</a></span></td></tr>'
+        )
+    
+    @pytest.fixture
+    def mock_get(self):
+        """Story 2 dropped from page 1 to page 2 between the two fetches"""
+        pages = {
+            1: self.row(1, "One") + self.row(2, "Two"),
+            2: self.row(2, "Two") + self.row(3, "Three"),
+        }
+        async def get(url, **kwargs):
+            response = Mock()
+            response.content = pages[int(url.rsplit("p=", 1)[-1])]
+            response.raise_for_status.return_value = None
+            return response
+        with patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = get
+            yield mock_get
+    
+    def test_story_on_two_pages_listed_once(self, mock_get, scraper):
+        """Test that every view of a range keeps only the first listing of a story"""
+        expected = ["One", "Two", "Three"]
+        
+        assert [a["title"] for a in asyncio.run(scraper.get_articles(2))] == expected
+        assert [a["title"] for a in json.loads(asyncio.run(scraper.get_articles_json(2)).body)] == expected
+        assert [a["title"] for a in json.loads(asyncio.run(scraper.get_range_json(1, 2)).body)] == expected
+        assert [a["title"] for a in json.loads(asyncio.run(scraper.get_window_json(0, 31)).body)] == expected
+        assert [a["title"] for a in scraper.search(sort="rank")] == expected
+        
+        async def stream():
+            return [article.title async for articles in scraper.iter_pages(2) for article in articles]
+        assert asyncio.run(stream()) == expected
+    
+    def test_page_alone_keeps_its_stories(self, mock_get, scraper):
+        """Test that a page served on its own is not deduplicated against other pages"""
+        asyncio.run(scraper.get_articles(2))
+        
+        assert [a["title"] for a in json.loads(asyncio.run(scraper.get_range_json(2, 2)).body)] == ["Two", "Three"]
+    
+    def test_consistent_range_refetches_skewed_pages(self, mock_get, scraper):
+        """Test that consistent mode refetches pages cached too long before the others"""
+        asyncio.run(scraper.get_articles(2))
+        entry = scraper.cache.entry(1)
+        scraper.cache.put(1, entry.articles, entry.fetched_at - 60)
+        mock_get.reset_mock()
+        
+        asyncio.run(scraper.get_articles(2))
+        assert mock_get.call_count == 0
+        
+        asyncio.run(scraper.get_articles(2, consistent=True))
+        assert [call.args[0] for call in mock_get.call_args_list] == ["https://news.ycombinator.com?p=1"]
+        assert client.get("/2?consistent=true").status_code == 200
+
+
+class TestConditionalRefresh:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+    
+    @pytest.fixture
+    def scraper(self):
+        return get_scraper()
+    
+    @staticmethod
+    def make_response(title, status_code=200, headers=None):
+        mock_response = Mock()
+        mock_response.status_code = status_code
+        mock_response.headers = headers or {}
+        mock_response.content = f'<tr class="athing" id="1"><td><span class="titleline"><a href="https://example.com">{title}</a></span></td></tr>'.encode()
+        mock_response.raise_for_status.return_value = None
+        return mock_response
+    
+    @staticmethod
+    def expire(scraper, page):
+        scraper.cache.entry(page).fetched_at -= CACHE_MAX_AGE + 1
+    
+    @patch('app.scraper.parse_articles', wraps=parse_articles)
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_identical_body_not_parsed_again(self, mock_get, mock_parse, scraper):
+        """Test that a refresh returning the same body keeps the parsed articles"""
+        mock_get.return_value = self.make_response("Same")
+        asyncio.run(scraper.get_articles(1))
+        articles = scraper.cache[1]
+        self.expire(scraper, 1)
+        
+        asyncio.run(scraper.get_articles(1))
+        
+        assert mock_get.call_count == 2
+        assert mock_parse.call_count == 1
+        assert scraper.cache[1] is articles
+        assert scraper.get_cache_status()["pages"][1]["state"] == "fresh"
+        assert scraper.get_cache_status()["refreshes"] == {"changed": 1, "unchanged": 1}
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_upstream_validators_sent_and_304_honoured(self, mock_get, scraper):
+        """Test that ETag and Last-Modified are revalidated and a 304 keeps the cached page"""
+        validators = {"ETag": '"v1"', "Last-Modified": "Sat, 14 Sep 2024 10:00:00 GMT"}
+        mock_get.side_effect = [
+            self.make_response("Original", headers=validators),
+            self.make_response("", status_code=304),
+        ]
+        asyncio.run(scraper.get_articles(1))
+        self.expire(scraper, 1)
+        
+        asyncio.run(scraper.get_articles(1))
+        
+        assert mock_get.call_args.kwargs["headers"] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Sat, 14 Sep 2024 10:00:00 GMT"
+        }
+        assert scraper.cache[1][0].title == "Original"
+        assert scraper.get_cache_status()["refreshes"]["unchanged"] == 1
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_changed_body_replaces_page(self, mock_get, scraper):
+        mock_get.side_effect = [self.make_response("Before"), self.make_response("After")]
+        asyncio.run(scraper.get_articles(1))
+        self.expire(scraper, 1)
+        
+        asyncio.run(scraper.get_articles(1))
+        
+        assert scraper.cache[1][0].title == "After"
+        assert scraper.get_cache_status()["refreshes"] == {"changed": 2, "unchanged": 0}
+    
+    def test_touch_renews_age_in_both_backends(self, tmp_path):
+        for cache in (PageCache(), SQLiteCache(str(tmp_path / "cache.sqlite3"))):
+            cache.put(1, [make_article("Article 1")], 0)
+            assert cache.touch(1, 100.0)
+            assert cache.entry(1).fetched_at == 100.0
+            assert cache[1] == [make_article("Article 1")]
+            assert not cache.touch(2, 100.0)
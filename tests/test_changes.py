@@ -0,0 +1,136 @@
+import asyncio
+import json
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.cache import PageCache
+from app.changes import ChangeFeed, RESET_EVENT, diff_page, event_stream
+from app.scraper import HackerNewsScraper
+from tests.conftest import make_story
+
+
+def decode(event: bytes):
+    """The JSON data of a server-sent event"""
+    data = next(line for line in event.decode().splitlines() if line.startswith("data: "))
+    return json.loads(data[len("data: "):])
+
+
+class TestDiffPage:
+    def test_added_removed_moved_and_updated(self):
+        old = [make_story(1, points=10), make_story(2), make_story(3)]
+        new = [make_story(2), make_story(1, points=15, comments=2), make_story(4)]
+
+        change = diff_page(2, old, new)
+
+        assert change["page"] == 2
+        assert [(a["id"], a["rank"]) for a in change["added"]] == [("4", 33)]
+        assert change["removed"] == ["3"]
+        assert change["moved"] == [
+            {"id": "2", "rank": 31, "previous_rank": 32},
+            {"id": "1", "rank": 32, "previous_rank": 31},
+        ]
+        assert change["updated"] == [{"id": "1", "points": 15, "comments": 2}]
+
+    def test_unchanged_page_has_no_diff(self):
+        page = [make_story(1), make_story(2)]
+
+        assert diff_page(1, page, list(page)) is None
+
+
+class TestChangeFeed:
+    def test_one_encoded_event_fanned_out_to_interested_subscribers(self):
+        async def scenario():
+            feed = ChangeFeed()
+            front, all_pages = feed.subscribe(1), feed.subscribe(10)
+
+            feed.page_stored(1, [make_story(1)])
+            feed.page_stored(2, [make_story(2)])
+
+            first = await front.get()
+            assert first is await all_pages.get()
+            assert front.queue.empty()
+            return decode(first), decode(await all_pages.get())
+
+        first, second = asyncio.run(scenario())
+        assert first["added"][0]["id"] == "1"
+        assert second["page"] == 2
+
+    def test_eviction_and_identical_refresh_broadcast_nothing(self):
+        async def scenario():
+            feed = ChangeFeed()
+            feed.page_stored(1, [make_story(1)])
+            subscription = feed.subscribe(10)
+
+            feed.page_removed(1)
+            feed.page_stored(1, [make_story(1)])
+            return subscription.queue.empty()
+
+        assert asyncio.run(scenario())
+
+    def test_slow_subscriber_reset_instead_of_buffering(self):
+        async def scenario():
+            feed = ChangeFeed(queue_size=2)
+            slow, fast = feed.subscribe(10), feed.subscribe(10)
+            for points in range(3):
+                feed.page_stored(1, [make_story(1, points=points)])
+                await fast.get()
+            return slow, fast
+
+        slow, fast = asyncio.run(scenario())
+        assert slow.resets == 1
+        assert slow.queue.qsize() == 1
+        assert slow.queue.get_nowait() == RESET_EVENT
+        assert fast.resets == 0
+
+    def test_event_stream_sends_events_and_heartbeats_then_unsubscribes(self):
+        async def scenario():
+            feed = ChangeFeed()
+            subscription = feed.subscribe(10)
+            disconnected = False
+
+            async def is_disconnected():
+                return disconnected
+
+            stream = event_stream(feed, subscription, is_disconnected, heartbeat=0.01)
+            assert await stream.__anext__() == b"retry: 5000\n\n"
+            assert await stream.__anext__() == b": keepalive\n\n"
+            feed.page_stored(1, [make_story(1)])
+            event = await stream.__anext__()
+            disconnected = True
+            await stream.aclose()
+            return event, feed.subscribers
+
+        event, subscribers = asyncio.run(scenario())
+        assert event.startswith(b"id: 1\nevent: change\n")
+        assert subscribers == []
+
+
+class TestScraperChanges:
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_refresh_broadcasts_diff(self, mock_get):
+        """Test that a page refreshed with a new story pushes only that difference"""
+        rows = {
+            "first": '<tr class="athing" id="1"><td><span class="titleline"><a href="https://example.com">One</a></span></td></tr>',
+            "second": '<tr class="athing" id="2"><td><span class="titleline"><a href="https://example.com">Two</a></span></td></tr>',
+        }
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        scraper = HackerNewsScraper(PageCache())
+
+        async def scenario():
+            mock_response.content = rows["first"]
+            await scraper.get_articles(1)
+            subscription = scraper.changes.subscribe(1)
+            mock_response.content = rows["second"] + rows["first"]
+            await scraper.refresh_page(1)
+            await scraper.close()
+            return decode(await subscription.get())
+
+        change = asyncio.run(scenario())
+        assert [article["id"] for article in change["added"]] == ["2"]
+        assert change["moved"] == [{"id": "1", "rank": 2, "previous_rank": 1}]
+        assert change["removed"] == [] and change["updated"] == []
+
+    def test_changes_endpoint_rejects_invalid_page_count(self):
+        assert TestClient(app).get("/changes?pages=0").status_code == 400
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.config import CRAWL_MIN_INTERVAL, CRAWL_MAX_INTERVAL
+from app.crawler import Crawler, PageDemand
+from app.dependencies import get_scraper, reset_scraper
+from app.main import app
+from tests.conftest import run
+
+
+def age(scraper, page, seconds):
+    entry = scraper.cache.entry(page)
+    scraper.cache.put(page, entry.articles, time.time() - seconds)
+
+
+class TestPageDemand:
+    def test_scores_decay_by_half_life(self):
+        demand = PageDemand(half_life=10)
+        demand.record(1, 2, now=0)
+        demand.record(1, 1, now=0)
+
+        assert demand.score(1, now=0) == 2
+        assert demand.score(2, now=10) == 0.5
+        assert demand.tail_score(1, now=0) == 1
+        assert demand.tail_score(2, now=0) == 1
+
+    def test_forgotten_once_demand_fades(self):
+        demand = PageDemand(half_life=10)
+        demand.record(5, 5, now=0)
+
+        assert demand.scores(now=10) == {5: 0.5}
+        assert demand.scores(now=100) == {}
+        assert demand.tails(now=100) == {}
+
+
+class TestCrawler:
+    def test_warm_up_fetches_missing_first_pages(self, upstream, scraper):
+        crawler = Crawler(scraper, warm_pages=2)
+
+        assert sorted(run(scraper, crawler.warm_up())) == [1, 2]
+        assert sorted(upstream.requests) == [1, 2]
+        # Warming up is not client demand
+        assert scraper.demand.scores() == {}
+
+        assert run(scraper, crawler.warm_up()) == []
+        assert len(upstream.requests) == 2
+
+    def test_refresh_interval_shrinks_with_demand(self, scraper):
+        crawler = Crawler(scraper)
+
+        assert crawler.interval(10, top=10) == CRAWL_MIN_INTERVAL
+        assert crawler.interval(5, top=10) == 2 * CRAWL_MIN_INTERVAL
+        assert crawler.interval(0.1, top=10) == CRAWL_MAX_INTERVAL
+        assert crawler.interval(0, top=10) == CRAWL_MAX_INTERVAL
+
+    def test_popular_pages_refreshed_more_often(self, upstream, scraper):
+        """Test that a page requested far more often is refreshed sooner than a rare one"""
+        crawler = Crawler(scraper, warm_pages=0)
+        run(scraper, scraper.get_range_json(1, 2))
+        for _ in range(9):
+            run(scraper, scraper.get_articles_json(1))
+        age(scraper, 1, CRAWL_MIN_INTERVAL)
+        age(scraper, 2, CRAWL_MIN_INTERVAL)
+        upstream.requests.clear()
+
+        assert run(scraper, crawler.crawl_once()) == [1]
+
+        age(scraper, 2, CRAWL_MAX_INTERVAL)
+        assert run(scraper, crawler.crawl_once()) == [2]
+        assert upstream.requests == [1, 2]
+
+    def test_next_page_prefetched_after_repeated_requests(self, upstream, scraper):
+        crawler = Crawler(scraper, warm_pages=0)
+        run(scraper, scraper.get_articles_json(1))
+        assert crawler.due() == []
+
+        for _ in range(2):
+            run(scraper, scraper.get_articles_json(1))
+        assert crawler.due() == [(2, "prefetch")]
+
+        assert run(scraper, crawler.crawl_once()) == [2]
+        assert scraper.cache.entry(2) is not None
+        assert crawler.due() == []
+
+    def test_no_crawling_while_breaker_open(self, upstream, scraper):
+        crawler = Crawler(scraper, warm_pages=1)
+        scraper.breaker.record_failure()
+        scraper.breaker._opened_at = time.monotonic()
+
+        assert run(scraper, crawler.crawl_once()) == []
+        assert upstream.requests == []
+
+    def test_failed_pass_logged_and_crawling_continues(self, upstream, scraper, caplog):
+        """Test that an error outside the fetches doesn't stop the crawler"""
+        crawler = Crawler(scraper, warm_pages=1, tick=0.01)
+        calls = []
+
+        async def crawl_once():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return []
+        crawler.crawl_once = crawl_once
+
+        async def crawl():
+            task = asyncio.create_task(crawler.run())
+            while len(calls) < 3:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run(scraper, crawl())
+        assert len(calls) >= 3
+        assert "Crawler pass failed" in caplog.text
+
+    def test_app_starts_crawler(self, upstream):
+        """Test that the app warms the first pages at startup when the crawler is enabled"""
+        reset_scraper()
+        get_scraper().base_url = upstream.url
+        try:
+            with patch('app.main.CRAWLER_ENABLED', True):
+                with TestClient(app):
+                    deadline = time.monotonic() + 5
+                    while len(get_scraper().cache) < 3 and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                    assert sorted(get_scraper().cache.keys()) == [1, 2, 3]
+        finally:
+            reset_scraper()
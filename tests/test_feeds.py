@@ -0,0 +1,116 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.cache import NamespacedCache, PageCache
+from app.dependencies import get_scraper, reset_scraper
+from app.feeds import FEED_KEY_SPAN, FEEDS, FRONT_PAGE
+from app.main import app
+from tests.conftest import make_story, run
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    reset_scraper()
+    yield
+    reset_scraper()
+
+
+class Recorder:
+    def __init__(self):
+        self.stored, self.removed = [], []
+
+    def page_stored(self, page, articles):
+        self.stored.append(page)
+
+    def page_removed(self, page):
+        self.removed.append(page)
+
+
+class TestFeeds:
+    def test_urls(self):
+        assert FRONT_PAGE.url("https://news.ycombinator.com", 2) == "https://news.ycombinator.com?p=2"
+        assert FEEDS["newest"].url("https://news.ycombinator.com", 1) == "https://news.ycombinator.com/newest?p=1"
+
+    def test_namespaced_views_share_a_backend_without_colliding(self):
+        backend = PageCache()
+        front, ask = NamespacedCache(backend, 0, FEED_KEY_SPAN), NamespacedCache(backend, FEED_KEY_SPAN, FEED_KEY_SPAN)
+        recorder = Recorder()
+        ask.add_listener(recorder)
+
+        front.put(1, [make_story(1)], time.time())
+        ask.put(1, [make_story(2)], time.time())
+        del ask[1]
+
+        assert sorted(backend) == [1]
+        assert list(front) == [1] and len(ask) == 0
+        assert recorder.stored == [1] and recorder.removed == [1]
+        assert front.stats()["entries"] == 1
+
+
+class TestFeedScrapers:
+    def test_feed_fetched_from_its_path_and_cached_apart(self, upstream, scraper):
+        newest = scraper.for_feed("newest")
+
+        articles = run(scraper, newest.get_articles(1))
+
+        assert articles
+        assert upstream.paths == ["/news/newest"]
+        assert list(newest.cache) == [1]
+        assert list(scraper.cache) == []
+        assert sorted(scraper.store) == [FEEDS["newest"].key_offset + 1]
+        assert scraper.get_cache_status()["feeds"]["newest"]["cached_pages"] == [1]
+
+    def test_feeds_share_client_and_upstream_protection(self, upstream, scraper):
+        ask = scraper.for_feed("ask")
+        assert scraper.for_feed("ask") is ask
+        assert scraper.for_feed("news") is scraper
+
+        async def clients():
+            return scraper._get_client() is ask._get_client()
+
+        assert run(scraper, clients())
+        for _ in range(scraper.breaker.failure_threshold):
+            scraper.breaker.record_failure()
+        with pytest.raises(HTTPException) as error:
+            run(scraper, ask.get_articles(1))
+        assert error.value.status_code == 503
+        assert upstream.requests == []
+
+    def test_unknown_feed_rejected(self, scraper):
+        with pytest.raises(HTTPException) as error:
+            scraper.for_feed("best")
+        assert error.value.status_code == 404
+
+    def test_ttl_is_per_feed(self, upstream, scraper):
+        """Test that a page two minutes old is fresh on the front page but stale on /newest"""
+        newest = scraper.for_feed("newest")
+        fetched_at = time.time() - 120
+        scraper.cache.put(1, [make_story(1)], fetched_at)
+        newest.cache.put(1, [make_story(2)], fetched_at)
+
+        async def lookups():
+            front_entry, newest_entry = scraper._lookup_page(1), newest._lookup_page(1)
+            await asyncio.gather(*newest._inflight.values())
+            return front_entry, newest_entry
+
+        front_entry, newest_entry = run(scraper, lookups())
+        assert front_entry.fetched_at == newest_entry.fetched_at == fetched_at
+        assert upstream.paths == ["/news/newest"]
+        assert newest.cache.entry(1).fetched_at > fetched_at
+
+
+class TestFeedEndpoints:
+    def test_feed_endpoints(self, upstream):
+        get_scraper().base_url = upstream.url
+        client = TestClient(app)
+
+        assert client.get("/show").status_code == 200
+        assert client.get("/show/2").status_code == 200
+        assert client.get("/show/0").status_code == 400
+        response = client.get("/pages?feed=jobs&offset=0&limit=10")
+        assert response.status_code == 200
+        assert response.headers["Link"] == '</pages?offset=10&limit=10&feed=jobs>; rel="next"'
+        assert client.get("/pages?feed=best").status_code == 404
+        assert set(upstream.paths) == {"/news/show", "/news/jobs"}
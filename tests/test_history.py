@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from app.cache import PageCache
+from app.dependencies import get_scraper, reset_scraper
+from app.feeds import FEEDS
+from app.history import HistoryLog, MAGIC, RECORD
+from app.main import app
+from app.scraper import HackerNewsScraper
+from tests.conftest import make_story
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history.bin")
+
+
+class TestHistoryLog:
+    def test_only_changes_recorded(self, path):
+        log = HistoryLog(path)
+        log.append(1, [make_story(1, points=5), make_story(2)], timestamp=100)
+        log.append(1, [make_story(1, points=5), make_story(2)], timestamp=160)
+        log.append(1, [make_story(2), make_story(1, points=9, comments=1)], timestamp=220)
+
+        assert log.query(1) == [(100, 0, 1, 5, 0), (220, 0, 2, 9, 1)]
+        assert log.query(2) == [(100, 0, 2, 0, 0), (220, 0, 1, 0, 0)]
+        assert log.query(3) is None
+        assert log.stats() == {"records": 4, "items": 2, "bytes": len(MAGIC) + 4 * RECORD.size}
+
+    def test_range_and_limit(self, path):
+        log = HistoryLog(path)
+        for minute in range(10):
+            log.append(1, [make_story(1, points=minute)], timestamp=minute * 60)
+
+        assert [record[3] for record in log.query(1, since=120, until=300)] == [2, 3, 4, 5]
+        assert [record[3] for record in log.query(1, since=120, until=300, limit=2)] == [4, 5]
+        assert log.query(1, since=1000) == []
+
+    def test_rank_and_feed_from_cache_key(self, path):
+        log = HistoryLog(path)
+        log.append(FEEDS["newest"].key_offset + 2, [make_story(7)], timestamp=100)
+
+        assert log.query(7) == [(100, FEEDS["newest"].namespace, 31, 0, 0)]
+
+    def test_reopened_log_indexes_records_and_drops_partial_one(self, path):
+        log = HistoryLog(path)
+        log.append(1, [make_story(1, points=1), make_story(2)], timestamp=100)
+        log.close()
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        reopened = HistoryLog(path)
+        assert reopened.query(1) == [(100, 0, 1, 1, 0)]
+        # Unchanged stories are still recognized after a restart
+        reopened.append(1, [make_story(1, points=1), make_story(2)], timestamp=200)
+        assert reopened.records == 2
+
+    def test_records_of_other_writers_indexed(self, path):
+        reader, writer = HistoryLog(path), HistoryLog(path)
+        writer.append(1, [make_story(1)], timestamp=100)
+
+        assert reader.query(1) == [(100, 0, 1, 0, 0)]
+
+    def test_missing_points_recorded_as_zero(self, path):
+        log = HistoryLog(path)
+        log.append(1, [make_story(1, points=None)], timestamp=100)
+        log.append(1, [make_story(1, points=None)], timestamp=160)
+
+        assert log.query(1) == [(100, 0, 1, 0, 0)]
+
+    def test_rejects_other_files(self, path):
+        with open(path, "wb") as f:
+            f.write(b"not a log")
+        with pytest.raises(ValueError):
+            HistoryLog(path)
+
+
+class TestHistoryEndpoint:
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        reset_scraper()
+        yield
+        reset_scraper()
+
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_refreshes_recorded_and_served(self, mock_get, path):
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.content = (
+            '<tr class="athing" id="42"><td><span class="titleline"><a href="https://example.com">One</a></span></td></tr>'
+            '<tr><td class="subtext"><span class="score">10 points</span></td></tr>'
+        )
+        mock_get.return_value = mock_response
+
+        with patch('app.scraper.HISTORY_PATH', path):
+            client = TestClient(app)
+            client.get("/")
+            mock_response.content = mock_response.content.replace("10 points", "12 points")
+            asyncio.run(get_scraper().refresh_page(1))
+
+            response = client.get("/history/42")
+            assert response.status_code == 200
+            history = response.json()["history"]
+            assert [(point["feed"], point["rank"], point["points"]) for point in history] == [
+                ("news", 1, 10), ("news", 1, 12)
+            ]
+            assert client.get("/history/42?limit=1").json()["history"][0]["points"] == 12
+            assert client.get("/history/43").status_code == 404
+            assert client.get("/history/42?limit=0").status_code == 400
+
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_digitless_score_recorded_without_breaking_listeners(self, mock_get, path):
+        """Test that a row whose score has no digits is logged and still reaches the index"""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.content = (
+            '<tr class="athing" id="42"><td><span class="titleline"><a href="https://example.com">One</a></span></td></tr>'
+            '<tr><td class="subtext"><span class="score">points</span></td></tr>'
+        )
+        mock_get.return_value = mock_response
+
+        with patch('app.scraper.HISTORY_PATH', path):
+            client = TestClient(app)
+            response = client.get("/")
+            assert response.status_code == 200
+            assert response.json()[0]["points"] is None
+            assert client.get("/history/42").json()["history"][0]["points"] == 0
+            assert [article["id"] for article in client.get("/search?q=one").json()] == ["42"]
+
+    def test_disabled_without_path(self):
+        assert TestClient(app).get("/history/42").status_code == 404
+        assert HackerNewsScraper(PageCache()).get_cache_status()["history"] is None
@@ -0,0 +1,145 @@
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.dependencies import reset_scraper
+from app.cache import PageCache, SQLiteCache
+from app.index import ArticleIndex, tokenize
+from app.models import Article
+from tests.conftest import make_article
+
+client = TestClient(app)
+
+def titles(articles):
+    return [article.title for article in articles]
+
+class TestArticleIndex:
+    @pytest.fixture
+    def index(self):
+        index = ArticleIndex()
+        index.page_stored(1, [
+            make_article("Show HN: A Rust compiler", points=120, sent_by="alice", comments=40),
+            make_article("Python 3.13 released", points=300, sent_by="bob", comments=150),
+            make_article("Who is hiring?", points=None, sent_by="whoishiring", comments=500),
+        ])
+        index.page_stored(2, [
+            make_article("Writing a compiler in Python", points=80, sent_by="alice", comments=12),
+            make_article("Rust in the Linux kernel", points=300, sent_by="carol", comments=90),
+        ])
+        return index
+
+    def test_tokenize(self):
+        assert tokenize("Show HN: Python 3.13's new JIT") == ["show", "hn", "python", "3", "13", "s", "new", "jit"]
+
+    def test_query_matches_all_tokens_in_rank_order(self, index):
+        assert titles(index.search(query="compiler")) == ["Show HN: A Rust compiler", "Writing a compiler in Python"]
+        assert titles(index.search(query="RUST compiler")) == ["Show HN: A Rust compiler"]
+        assert index.search(query="haskell") == []
+
+    def test_user_filter(self, index):
+        assert titles(index.search(user="alice")) == ["Show HN: A Rust compiler", "Writing a compiler in Python"]
+        assert titles(index.search(query="python", user="alice")) == ["Writing a compiler in Python"]
+
+    def test_sorted_views_with_thresholds(self, index):
+        assert titles(index.search(sort="points", limit=3)) == [
+            "Python 3.13 released", "Rust in the Linux kernel", "Show HN: A Rust compiler"
+        ]
+        assert titles(index.search(sort="comments", min_points=100)) == [
+            "Python 3.13 released", "Rust in the Linux kernel", "Show HN: A Rust compiler"
+        ]
+        assert titles(index.search(sort="points", min_points=150, min_comments=100)) == ["Python 3.13 released"]
+        assert titles(index.search(min_comments=100)) == ["Python 3.13 released", "Who is hiring?"]
+
+    def test_rank_order_thresholds_only_visit_articles_above_them(self, index):
+        """Test that filtering in listing order starts from the sorted views instead of scanning"""
+        for page in range(3, 50):
+            index.page_stored(page, [make_article(f"Story {page}-{i}", points=i) for i in range(30)])
+        visited = []
+        matches = index._matches
+        def spy(key, min_points, min_comments):
+            visited.append(key)
+            return matches(key, min_points, min_comments)
+        index._matches = spy
+
+        assert titles(index.search(min_points=250)) == ["Python 3.13 released", "Rust in the Linux kernel"]
+        assert sorted(visited) == [(1, 1), (2, 1)]
+
+        visited.clear()
+        assert index.search(min_points=100000) == []
+        assert index.search(min_points=10, min_comments=400) == []
+        assert visited == [(1, 2)]
+
+    def test_replaced_and_removed_pages_leave_no_postings(self, index):
+        index.page_stored(2, [make_article("Go generics", points=10, sent_by="dave")])
+        assert titles(index.search(user="alice")) == ["Show HN: A Rust compiler"]
+        assert titles(index.search(query="go")) == ["Go generics"]
+
+        index.page_removed(1)
+        index.page_removed(2)
+        assert len(index) == 0
+        assert index.search(sort="points") == []
+        assert not index._tokens and not index._users
+
+    def test_unknown_sort_rejected(self, index):
+        with pytest.raises(ValueError):
+            index.search(sort="title")
+
+class TestIndexFollowsCache:
+    def test_page_cache_evictions_update_index(self):
+        cache = PageCache(max_entries=1)
+        index = ArticleIndex()
+        cache.add_listener(index)
+
+        cache[1] = [make_article("First page")]
+        cache[2] = [make_article("Second page")]
+
+        assert titles(index.search(query="page")) == ["Second page"]
+        del cache[2]
+        assert len(index) == 0
+
+    def test_sqlite_cache_reports_other_workers_pages(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        writer, reader = SQLiteCache(path), SQLiteCache(path)
+        index = ArticleIndex()
+        reader.add_listener(index)
+
+        writer[1] = [make_article("Shared page")]
+        reader.lookup(1)
+        assert titles(index.search(query="shared")) == ["Shared page"]
+
+        del writer[1]
+        reader.lookup(1)
+        assert len(index) == 0
+
+class TestSearchEndpoint:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_search_cached_articles(self, mock_get):
+        """Test that /search queries articles cached by earlier requests without fetching"""
+        mock_response = Mock()
+        mock_response.content = """
+        <tr class="athing" id="1"><td><span class="titleline"><a href="https://example.com">Rust 2.0</a></span></td></tr>
+        <tr><td class="subtext"><span class="score">42 points</span> by <a class="hnuser">alice</a>
+        <span class="age">1 hour ago</span> | <a>3 comments</a></td></tr>
+        """
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        assert client.get("/search?q=rust").json() == []
+        client.get("/")
+        mock_get.reset_mock()
+
+        response = client.get("/search?q=rust&user=alice&min_points=40&sort=points")
+        assert response.status_code == 200
+        assert titles(Article.from_dict(data) for data in response.json()) == ["Rust 2.0"]
+        mock_get.assert_not_called()
+
+    def test_invalid_parameters_rejected(self):
+        assert client.get("/search?sort=title").status_code == 400
+        assert client.get("/search?limit=0").status_code == 400
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.dependencies import reset_scraper
+from app.metrics import REGISTRY, SCRAPE_SECONDS, ASSEMBLE_SECONDS, ENCODE_SECONDS, Counter, Histogram, Registry
+
+client = TestClient(app)
+
+
+class TestMetricTypes:
+    @pytest.fixture
+    def registry(self):
+        with patch('app.metrics.REGISTRY', Registry()) as registry:
+            yield registry
+
+    def test_histogram_renders_cumulative_buckets(self, registry):
+        histogram = registry.register(Histogram("latency_seconds", "Latency", ["phase"], buckets=(0.1, 1)))
+        histogram.observe(0.05, phase="parse")
+        histogram.observe(0.5, phase="parse")
+        histogram.observe(5, phase="parse")
+
+        assert registry.render().splitlines() == [
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{phase="parse",le="0.1"} 1',
+            'latency_seconds_bucket{phase="parse",le="1.0"} 2',
+            'latency_seconds_bucket{phase="parse",le="+Inf"} 3',
+            'latency_seconds_sum{phase="parse"} 5.55',
+            'latency_seconds_count{phase="parse"} 3',
+        ]
+
+    def test_counter_escapes_labels(self, registry):
+        counter = registry.register(Counter("events_total", "Events", ["name"]))
+        counter.inc(name='say "hi"')
+        counter.inc(2, name='say "hi"')
+
+        assert 'events_total{name="say \\"hi\\""} 3' in registry.render()
+
+    def test_disabled_registry_records_nothing(self, registry):
+        registry.enabled = False
+        histogram = registry.register(Histogram("latency_seconds", "Latency"))
+        counter = registry.register(Counter("events_total", "Events"))
+
+        with histogram.time():
+            counter.inc()
+
+        assert histogram.count() == 0
+        assert counter.value() == 0
+
+
+class TestMetricsEndpoint:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_request_timings_recorded(self, mock_get):
+        """Test that a request records network, parse, assembly and encoding timings"""
+        mock_response = Mock()
+        mock_response.content = '<tr class="athing" id="1"><td><span class="titleline"><a href="https://example.com">A</a></span></td></tr>'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        before = {
+            "network": SCRAPE_SECONDS.count(phase="network"),
+            "parse": SCRAPE_SECONDS.count(phase="parse"),
+            "assemble": ASSEMBLE_SECONDS.count(view="range"),
+            "encode": ENCODE_SECONDS.count(view="range"),
+        }
+
+        client.get("/2")
+
+        assert SCRAPE_SECONDS.count(phase="network") == before["network"] + 2
+        assert SCRAPE_SECONDS.count(phase="parse") == before["parse"] + 2
+        assert ASSEMBLE_SECONDS.count(view="range") == before["assemble"] + 1
+        assert ENCODE_SECONDS.count(view="range") == before["encode"] + 1
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "hn_cache_pages 2" in response.text
+        assert 'hn_cache_lookups_total{result="miss"} 2' in response.text
+        assert "hn_upstream_breaker_open 0" in response.text
+        assert 'hn_upstream_request_seconds_count{outcome="ok"}' in response.text
+        assert "hn_parse_row_seconds_bucket" in response.text
+
+    def test_metrics_enabled_by_default(self):
+        assert REGISTRY.enabled
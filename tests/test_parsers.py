@@ -0,0 +1,109 @@
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from app.config import BASE_URL
+from app.models import Article
+from app.parsers import PARSERS, parse_articles, parse_articles_bs4, parse_articles_lxml
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestParserParity:
+    """The lxml engine must return exactly what the BeautifulSoup engine returns"""
+    
+    @pytest.mark.parametrize("fixture", ["hn_page1.html", "hn_page2.html"])
+    def test_recorded_pages_parse_identically(self, fixture):
+        content = (FIXTURES / fixture).read_bytes()
+        
+        expected = parse_articles_bs4(content, BASE_URL)
+        
+        assert len(expected) == 30
+        assert parse_articles_lxml(content, BASE_URL) == expected
+    
+    def test_recorded_page_edge_cases(self):
+        """Test that jobs, discussions and non-ASCII titles are parsed the same way"""
+        content = (FIXTURES / "hn_page1.html").read_bytes()
+        articles = parse_articles_lxml(content, BASE_URL)
+        
+        jobs = [article for article in articles if "is hiring" in article.title]
+        assert jobs and all(job.sent_by == "unknown" and job.points == 0 for job in jobs)
+        assert any(article.title.startswith("Ünïcode “quotes”") for article in articles)
+        assert any(article.url.startswith(f"{BASE_URL}/item?id=") for article in articles)
+        assert articles[0].id == "41248998"
+        assert len({article.id for article in articles}) == 30
+    
+    @pytest.mark.parametrize("html", [
+        # Metadata with every field
+        """
+        <tr class="athing" id="1">
+            <td><span class="titleline"><a href="https://example.com">Test <b>Article</b> Title</a></span></td>
+        </tr>
+        <tr>
+            <td class="subtext">
+                <span class="score">150 points</span> by
+                <a class="hnuser" href="user?id=testuser">testuser</a>
+                <span class="age" title="2023-12-01T10:00:00">2 hours ago</span> |
+                <a href="item?id=1">25&nbsp;comments</a>
+            </td>
+        </tr>
+        """,
+        # Empty subtext and relative URL
+        """
+        <tr class="athing" id="2">
+            <td><span class="titleline"><a href="item?id=2">Title Only Article</a></span></td>
+        </tr>
+        <tr><td class="subtext"></td></tr>
+        """,
+        # Score without digits, age without link, no metadata row at all
+        """
+        <table>
+        <tr class="athing" id="3"><td><span class="titleline"><a href="/x">Odd</a></span></td></tr>
+        <tr><td class="subtext"><span class="score">points</span><span class="age">just now</span></td></tr>
+        <tr class="athing" id="4"><td><span class="titleline"><a href="/y">Last row</a></span></td></tr>
+        </table>
+        """,
+        # Rows without a title link are skipped
+        """
+        <tr class="athing"><td><span class="titleline">No link</span></td></tr>
+        <tr class="athing"><td>No titleline</td></tr>
+        """,
+        "<html><body>No valid articles</body></html>",
+        "",
+    ])
+    def test_snippets_parse_identically(self, html):
+        assert parse_articles_lxml(html, BASE_URL) == parse_articles_bs4(html, BASE_URL)
+        assert parse_articles_lxml(html.encode(), BASE_URL) == parse_articles_bs4(html.encode(), BASE_URL)
+
+
+class TestParserSelection:
+    def test_engines_registered(self):
+        assert set(PARSERS) == {"html.parser", "lxml"}
+    
+    def test_unknown_engine_rejected(self):
+        with pytest.raises(ValueError):
+            parse_articles("", BASE_URL, engine="html5lib")
+
+
+class TestArticleRecords:
+    def test_records_convert_to_public_shape(self):
+        content = (FIXTURES / "hn_page1.html").read_bytes()
+        article = parse_articles(content, BASE_URL)[0]
+        
+        assert list(article.to_dict()) == ["title", "url", "points", "sent_by", "published", "comments", "id"]
+        assert Article.from_dict(article.to_dict()) == article
+        assert not hasattr(article, "__dict__")
+    
+    @pytest.mark.parametrize("executor", ["inline", "process"])
+    def test_usernames_interned_across_pages(self, executor):
+        """Test that usernames are shared, including for records parsed in the process pool"""
+        pages = [(FIXTURES / name).read_bytes() for name in ("hn_page1.html", "hn_page2.html")]
+        if executor == "inline":
+            first, second = (parse_articles(page, BASE_URL) for page in pages)
+        else:
+            with ProcessPoolExecutor(1) as pool:
+                first, second = pool.map(parse_articles, pages, [BASE_URL] * 2)
+        
+        users = {article.sent_by: article.sent_by for article in first}
+        shared = [article for article in second if article.sent_by in users]
+        assert shared
+        assert all(article.sent_by is users[article.sent_by] for article in shared)
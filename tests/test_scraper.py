@@ -1,6 +1,11 @@
+import asyncio
+import json
 import pytest
-from unittest.mock import Mock, patch
-from app.config import MAX_PAGES
+from unittest.mock import Mock, AsyncMock, patch
+import httpx
+from fastapi.testclient import TestClient
+from app.config import MAX_PAGES, MAX_CONCURRENT_FETCHES, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_CONNECTIONS
+from app.main import app
 from fastapi import HTTPException
 from app.dependencies import get_scraper
 from app.dependencies import reset_scraper
@@ -40,7 +45,7 @@ class TestHackerNewsScraper:
         </html>
         """
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_success(self, mock_get, scraper, mock_html_response):
         """Test successful page scraping"""
         # Setup mock response
@@ -50,7 +55,7 @@ class TestHackerNewsScraper:
         mock_get.return_value = mock_response
         
         # Execute
-        articles = scraper.scrape_page(1)
+        articles = asyncio.run(scraper.scrape_page(1))
         
         # Assert
         assert len(articles) == 1
@@ -65,7 +70,7 @@ class TestHackerNewsScraper:
         # Verify request was made correctly
         mock_get.assert_called_once_with("https://news.ycombinator.com?p=1")
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_with_page_number(self, mock_get, scraper, mock_html_response):
         """Test scraping with specific page number"""
         mock_response = Mock()
@@ -73,11 +78,11 @@ class TestHackerNewsScraper:
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
-        scraper.scrape_page(2)
+        asyncio.run(scraper.scrape_page(2))
         
         mock_get.assert_called_once_with("https://news.ycombinator.com?p=2")
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_handles_relative_urls(self, mock_get, scraper):
         """Test handling of relative URLs"""
         html_with_relative_url = """
@@ -103,11 +108,11 @@ class TestHackerNewsScraper:
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
-        articles = scraper.scrape_page(1)
+        articles = asyncio.run(scraper.scrape_page(1))
         
         assert articles[0]["url"] == "https://news.ycombinator.com/item?id=12345"
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_handles_missing_metadata_field(self, mock_get, scraper):
         """Test handling of articles with missing fields"""
         html_missing_fields = """
@@ -129,7 +134,7 @@ class TestHackerNewsScraper:
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
-        articles = scraper.scrape_page(1)
+        articles = asyncio.run(scraper.scrape_page(1))
         
         assert len(articles) == 1
         article = articles[0]
@@ -140,18 +145,18 @@ class TestHackerNewsScraper:
         assert article["sent_by"] == "unknown"
         assert article["comments"] == 0
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_network_error(self, mock_get, scraper):
         """Test handling of network errors"""
         mock_get.side_effect = Exception("Network error")
         
         with pytest.raises(HTTPException) as exc_info:
-            scraper.scrape_page(1)
+            asyncio.run(scraper.scrape_page(1))
         
         assert exc_info.value.status_code == 500
         assert "Failed to fetch Hacker News" in str(exc_info.value.detail)
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
     def test_scrape_page_malformed_html(self, mock_get, scraper):
         """Test handling of malformed HTML"""
         mock_response = Mock()
@@ -159,20 +164,265 @@ class TestHackerNewsScraper:
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
-        articles = scraper.scrape_page(1)
+        articles = asyncio.run(scraper.scrape_page(1))
         
         assert articles == []
     
     def test_get_articles_invalid_pages(self, scraper):
         """Test validation of page numbers"""
         with pytest.raises(HTTPException) as exc_info:
-            scraper.get_articles(0)
+            asyncio.run(scraper.get_articles(0))
         assert exc_info.value.status_code == 400
         
         with pytest.raises(HTTPException) as exc_info:
-            scraper.get_articles(-1)
+            asyncio.run(scraper.get_articles(-1))
         assert exc_info.value.status_code == 400
         
         with pytest.raises(HTTPException) as exc_info:
-            scraper.get_articles(MAX_PAGES + 1)
-        assert exc_info.value.status_code == 400
\ No newline at end of file
+            asyncio.run(scraper.get_articles(MAX_PAGES + 1))
+        assert exc_info.value.status_code == 400
+
+class TestConcurrentFetch:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+    
+    @pytest.fixture
+    def scraper(self):
+        return get_scraper()
+    
+    @staticmethod
+    def page_html(page):
+        return f"""
+        <tr class="athing" id="{page}">
+            <td><span class="titleline"><a href="https://example.com/{page}">Page {page}</a></span></td>
+        </tr>
+        """
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_missing_pages_fetched_concurrently_within_limit(self, mock_get, scraper):
+        """Test that pages are fetched concurrently, bounded, and kept in page order"""
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def slow_get(url):
+            nonlocal in_flight, max_in_flight
+            page = int(url.rsplit("=", 1)[1])
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # Later pages answer first to check reassembly order
+            await asyncio.sleep(0.01 * (MAX_PAGES - page))
+            in_flight -= 1
+            response = Mock()
+            response.content = self.page_html(page)
+            response.raise_for_status.return_value = None
+            return response
+        
+        mock_get.side_effect = slow_get
+        
+        articles = asyncio.run(scraper.get_articles(MAX_PAGES))
+        
+        assert [article["title"] for article in articles] == [f"Page {page}" for page in range(1, MAX_PAGES + 1)]
+        assert max_in_flight == min(MAX_CONCURRENT_FETCHES, MAX_PAGES)
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_partial_failure_caches_successful_pages(self, mock_get, scraper):
+        """Test that a failed page raises but the other pages stay cached"""
+        async def flaky_get(url):
+            page = int(url.rsplit("=", 1)[1])
+            if page == 2:
+                raise Exception("Network error")
+            response = Mock()
+            response.content = self.page_html(page)
+            response.raise_for_status.return_value = None
+            return response
+        
+        mock_get.side_effect = flaky_get
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(scraper.get_articles(3))
+        
+        assert exc_info.value.status_code == 500
+        assert sorted(scraper.cache.keys()) == [1, 3]
+
+
+class TestParseExecutor:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+    
+    @pytest.fixture
+    def mock_html_response(self):
+        return """
+        <tr class="athing" id="12345">
+            <td><span class="titleline"><a href="item?id=12345">Pooled Article</a></span></td>
+        </tr>
+        <tr>
+            <td class="subtext">
+                <span class="score">42 points</span> by
+                <a class="hnuser" href="user?id=testuser">testuser</a>
+                <a href="item?id=12345">3 comments</a>
+            </td>
+        </tr>
+        """
+    
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_pooled_parsing_matches_inline(self, mock_get, executor, mock_html_response):
+        """Test that parsing in a worker pool returns the same articles as inline parsing"""
+        mock_response = Mock()
+        mock_response.content = mock_html_response.encode()
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        scraper = get_scraper()
+        inline_articles = asyncio.run(scraper.scrape_page(1))
+        
+        scraper.parse_executor = executor
+        try:
+            pooled_articles = asyncio.run(scraper.scrape_page(1))
+            assert scraper._executor is not None
+        finally:
+            asyncio.run(scraper.close())
+        
+        assert pooled_articles == inline_articles
+        assert pooled_articles[0]["url"] == "https://news.ycombinator.com/item?id=12345"
+    
+    def test_unknown_executor_rejected(self):
+        scraper = get_scraper()
+        scraper.parse_executor = "gpu"
+        with pytest.raises(ValueError):
+            scraper._get_executor()
+
+
+class TestHTTPClient:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+        reset_scraper()
+    
+    def test_client_pooled_with_timeouts_and_compression(self):
+        """Test that the upstream client is configured for keep-alive, timeouts and compression"""
+        scraper = get_scraper()
+        
+        async def open_client():
+            await scraper.open()
+            client = scraper._client
+            await scraper.close()
+            return client
+        
+        client = asyncio.run(open_client())
+        
+        assert client.timeout.connect == HTTP_CONNECT_TIMEOUT
+        assert client.timeout.read == HTTP_READ_TIMEOUT
+        assert "gzip" in client.headers["Accept-Encoding"]
+        assert client._transport._pool._max_connections == HTTP_MAX_CONNECTIONS
+        assert client.is_closed
+    
+    def test_app_lifespan_opens_and_closes_client(self):
+        """Test that the client is opened at startup and closed at shutdown"""
+        with TestClient(app):
+            client = get_scraper()._client
+            assert client is not None
+            assert not client.is_closed
+        
+        assert client.is_closed
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_upstream_timeout_reported_as_error(self, mock_get):
+        """Test that an upstream timeout fails the request instead of hanging"""
+        mock_get.side_effect = httpx.ReadTimeout("timed out")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(get_scraper().scrape_page(1))
+        
+        assert exc_info.value.status_code == 500
+
+
+class TestStreaming:
+    @pytest.fixture(autouse=True)
+    def setup_scraper(self):
+        """Reset scraper before each test"""
+        reset_scraper()
+        yield
+    
+    @staticmethod
+    def page_response(page):
+        response = Mock()
+        response.content = "".join(
+            f'<tr class="athing" id="{page}{n}"><td><span class="titleline"><a href="https://example.com">Page {page} #{n}</a></span></td></tr>'
+            for n in range(2)
+        )
+        response.raise_for_status.return_value = None
+        return response
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_pages_yielded_before_slower_pages_finish(self, mock_get):
+        """Test that the first page is emitted while later pages are still being fetched"""
+        release_page_3 = None
+        
+        async def get(url):
+            page = int(url.rsplit("=", 1)[1])
+            if page == 3:
+                await release_page_3.wait()
+            return self.page_response(page)
+        
+        mock_get.side_effect = get
+        scraper = get_scraper()
+        
+        async def consume():
+            nonlocal release_page_3
+            release_page_3 = asyncio.Event()
+            titles = []
+            async for articles in scraper.iter_pages(3):
+                titles.append([article.title for article in articles])
+                if len(titles) == 2:
+                    # Pages 1 and 2 arrived while page 3 is still blocked
+                    assert 3 not in scraper.cache
+                    release_page_3.set()
+            return titles
+        
+        titles = asyncio.run(consume())
+        
+        assert titles == [[f"Page {page} #0", f"Page {page} #1"] for page in (1, 2, 3)]
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_stream_endpoint_returns_ndjson(self, mock_get):
+        mock_get.side_effect = lambda url: self.page_response(int(url.rsplit("=", 1)[1]))
+        client = TestClient(app)
+        
+        response = client.get("/stream/2")
+        negotiated = client.get("/2", headers={"Accept": "application/x-ndjson"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["title"] for line in lines] == ["Page 1 #0", "Page 1 #1", "Page 2 #0", "Page 2 #1"]
+        assert negotiated.text == response.text
+    
+    @patch('app.scraper.httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_stream_reports_upstream_failure_in_band(self, mock_get):
+        """Test that pages before a failure are streamed, followed by an error line"""
+        async def get(url):
+            page = int(url.rsplit("=", 1)[1])
+            if page == 2:
+                raise Exception("Network error")
+            return self.page_response(page)
+        
+        mock_get.side_effect = get
+        
+        response = TestClient(app).get("/stream/3")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        
+        assert [line["title"] for line in lines[:2]] == ["Page 1 #0", "Page 1 #1"]
+        assert "Failed to fetch Hacker News" in lines[2]["error"]
+        assert len(lines) == 3
+    
+    def test_stream_rejects_invalid_page_count(self):
+        assert TestClient(app).get(f"/stream/{MAX_PAGES + 1}").status_code == 400
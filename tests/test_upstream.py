@@ -0,0 +1,130 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from app.config import CACHE_MAX_AGE
+from app.upstream import CircuitBreaker, RetryPolicy, TokenBucket
+from tests.conftest import run
+
+
+@pytest.fixture
+def scraper(scraper):
+    """Fast retries, and a breaker that opens after two failures"""
+    scraper.retry_policy = RetryPolicy(retries=2, base_delay=0.01, max_delay=0.05)
+    scraper.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    return scraper
+
+
+class TestTokenBucket:
+    def test_burst_then_rate_limited(self):
+        bucket = TokenBucket(rate=20, burst=3, min_rate=1)
+
+        async def take(count):
+            started = time.monotonic()
+            for _ in range(count):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        assert asyncio.run(take(3)) < 0.03
+        # The next 2 requests wait for refills at 20 per second
+        assert asyncio.run(take(2)) >= 0.09
+
+    def test_throttle_and_recover(self):
+        bucket = TokenBucket(rate=8, burst=1, min_rate=1)
+
+        for _ in range(5):
+            bucket.throttle()
+        assert bucket.rate == 1
+
+        for _ in range(20):
+            bucket.recover()
+        assert bucket.rate == 8
+
+    def test_retry_delay_jittered_and_capped(self):
+        policy = RetryPolicy(retries=5, base_delay=1, max_delay=4)
+
+        assert all(0 <= policy.delay(attempt) <= 4 for attempt in range(10))
+        assert policy.delay(0, retry_after=3) >= 3
+        assert policy.delay(0, retry_after=60) <= 4
+
+
+class TestRetries:
+    def test_transient_errors_retried(self, upstream, scraper):
+        """Test that 503s are retried with backoff and slow the request rate down"""
+        upstream.fail(503, times=2)
+
+        articles = run(scraper, scraper.scrape_page(1))
+
+        assert len(articles) == 30
+        assert upstream.requests == [1, 1, 1]
+        assert scraper.retries == 2
+        assert scraper.rate_limiter.rate < scraper.rate_limiter.max_rate
+        assert scraper.breaker.state == CircuitBreaker.CLOSED
+
+    def test_client_errors_not_retried(self, upstream, scraper):
+        upstream.fail(404)
+
+        with pytest.raises(HTTPException) as exc_info:
+            run(scraper, scraper.scrape_page(1))
+
+        assert exc_info.value.status_code == 500
+        assert upstream.requests == [1]
+        assert scraper.breaker.failures == 0
+
+    def test_retries_exhausted_reported_as_error(self, upstream, scraper):
+        upstream.fail(502, times=3)
+
+        with pytest.raises(HTTPException) as exc_info:
+            run(scraper, scraper.scrape_page(1))
+
+        assert exc_info.value.status_code == 500
+        assert len(upstream.requests) == 3
+        assert scraper.breaker.failures == 1
+
+
+class TestCircuitBreaker:
+    def test_open_breaker_fails_fast_without_cache(self, upstream, scraper):
+        """Test that repeated failures open the breaker and stop upstream requests"""
+        upstream.fail(503, times=6)
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                run(scraper, scraper.scrape_page(1))
+        assert scraper.breaker.state == CircuitBreaker.OPEN
+        requests = len(upstream.requests)
+
+        with pytest.raises(HTTPException) as exc_info:
+            run(scraper, scraper.get_articles(1))
+
+        assert exc_info.value.status_code == 503
+        assert int(exc_info.value.headers["Retry-After"]) > 0
+        assert len(upstream.requests) == requests
+
+    def test_open_breaker_serves_expired_cache(self, upstream, scraper):
+        """Test that cached pages are served however old while upstream is down"""
+        run(scraper, scraper.get_articles(2))
+        for page in (1, 2):
+            entry = scraper.cache.entry(page)
+            scraper.cache.put(page, entry.articles, time.time() - CACHE_MAX_AGE - 1)
+        upstream.fail(503, times=6)
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                run(scraper, scraper.scrape_page(3))
+        requests = len(upstream.requests)
+
+        articles = run(scraper, scraper.get_articles(2))
+
+        assert len(articles) == 60
+        assert len(upstream.requests) == requests
+
+    def test_half_open_probe_closes_breaker(self, upstream, scraper):
+        """Test that after the reset timeout one probe goes upstream and closes the breaker"""
+        scraper.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        upstream.fail(503, times=3)
+        with pytest.raises(HTTPException):
+            run(scraper, scraper.scrape_page(1))
+        assert scraper.breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.06)
+        assert scraper.breaker.state == CircuitBreaker.HALF_OPEN
+        assert len(run(scraper, scraper.scrape_page(1))) == 30
+        assert scraper.breaker.state == CircuitBreaker.CLOSED